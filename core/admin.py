@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Categoria, Proveedor, Producto, MovimientoInventario
+from .models import (
+    Categoria, Proveedor, Producto, MovimientoInventario,
+    Venta, VentaLinea, VentaDiaria, VentaDiariaCategoria,
+)
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
@@ -21,4 +24,36 @@ class ProductoAdmin(admin.ModelAdmin):
 class MovimientoInventarioAdmin(admin.ModelAdmin):
     list_display = ("id", "producto", "tipo", "cantidad", "costo_unitario", "fecha")
     list_filter = ("tipo", "producto")
-    search_fields = ("producto__nombre", "sku")
+    list_select_related = ("producto",)
+    search_fields = ("producto__nombre", "producto__sku")
+
+@admin.register(VentaDiaria)
+class VentaDiariaAdmin(admin.ModelAdmin):
+    list_display = ("dia", "producto", "cantidad", "total_venta", "total_costo")
+    list_filter = ("dia",)
+    search_fields = ("producto__nombre", "producto__sku")
+
+@admin.register(VentaDiariaCategoria)
+class VentaDiariaCategoriaAdmin(admin.ModelAdmin):
+    list_display = ("dia", "categoria", "cantidad", "total_venta", "total_costo")
+    list_filter = ("dia", "categoria")
+
+class VentaLineaInline(admin.TabularInline):
+    model = VentaLinea
+    extra = 0
+    can_delete = False
+    readonly_fields = ("producto", "nombre", "sku", "cantidad", "precio_unitario", "costo_unitario", "total", "costo_total")
+    fields = readonly_fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(Venta)
+class VentaAdmin(admin.ModelAdmin):
+    list_display = ("id", "fecha", "usuario", "cantidad", "total", "costo_total")
+    list_filter = ("fecha",)
+    readonly_fields = ("fecha", "usuario", "cantidad", "total", "costo_total")
+    inlines = [VentaLineaInline]
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,33 @@
+# core/alertas.py
+"""
+Productos con stock bajo (/api/alertas/stock-bajo/, la consulta la Lambda de alertas).
+
+Producto.bajo_stock es una columna calculada por Postgres (activo y
+stock <= stock_minimo) con un índice parcial, así la lista sale del
+índice sin recorrer la tabla. La respuesta serializada se guarda en la
+caché con una huella de esas filas: cambia solo si un producto entra o
+sale de la lista o si cambia uno que está en ella (Producto.cambio).
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from .models import Producto
+
+TIEMPO_CACHE = 24 * 60 * 60
+
+
+def huella_stock_bajo():
+    fila = Producto.objects.filter(bajo_stock=True).aggregate(
+        n=Count("*"), ultimo=Max("cambio"), suma=Sum("cambio"),
+    )
+    return f"{fila['n']}-{fila['ultimo'] or 0}-{fila['suma'] or 0}"
+
+
+def datos_en_cache(huella, variante, generar):
+    """Datos ya serializados para esta huella; `variante` separa ?fields= y formatos."""
+    clave = f"stock_bajo:{huella}:{variante}"
+    datos = cache.get(clave)
+    if datos is None:
+        datos = generar()
+        cache.set(clave, datos, TIEMPO_CACHE)
+    return datos
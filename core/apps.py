@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
-    verbose_name = 'Placacenter Core'
\ No newline at end of file
+    verbose_name = 'Placacenter Core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,60 @@
+# core/busqueda.py
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+
+@lru_cache(maxsize=1)
+def trigram_disponible():
+    """True si la base es PostgreSQL y tiene pg_trgm instalado (ver migración 0004)."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def buscar_productos(qs, q):
+    """
+    Búsqueda de productos compartida por ventas, la lista de productos y la API.
+
+      - Si `q` es exactamente un SKU, devuelve solo ese producto (lector de
+        códigos / cajero que teclea el código).
+      - Con pg_trgm: subcadena en nombre o SKU (servida por los índices GIN)
+        más coincidencia por similitud para errores de tipeo ("tornilo"),
+        ordenado por similitud.
+      - Sin pg_trgm (SQLite en local, Postgres sin la extensión): subcadena
+        en nombre o SKU.
+    """
+    q = (q or "").strip()
+    if not q:
+        return qs
+
+    exacto = qs.filter(sku__in={q, q.upper()})
+    if exacto.exists():
+        return exacto
+
+    filtro = Q(nombre__icontains=q) | Q(sku__icontains=q)
+    if not trigram_disponible():
+        return qs.filter(filtro)
+
+    from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+    return (
+        qs.filter(filtro | Q(nombre__trigram_word_similar=q))
+        .annotate(similitud=Greatest(TrigramWordSimilarity(q, "nombre"), TrigramSimilarity("sku", q)))
+        .order_by("-similitud", "nombre")
+    )
+
+
+class ProductoSearchFilter(filters.SearchFilter):
+    """SearchFilter de DRF que usa buscar_productos en vez de icontains por campo."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return buscar_productos(queryset, " ".join(terms))
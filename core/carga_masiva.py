@@ -0,0 +1,334 @@
+# core/carga_masiva.py
+"""
+Carga masiva de inventario para PostgreSQL (manage.py cargar_inventario).
+
+El CSV se copia con COPY a una tabla temporal y desde ahí se mezcla con
+Categoria, Proveedor, Producto y MovimientoInventario usando sentencias
+sobre conjuntos (INSERT ... ON CONFLICT / UPDATE ... FROM), sin recorrer
+las filas en Python. Acepta el mismo formato que la importación web.
+"""
+from django.db import connection, transaction
+
+from . import versiones
+from .importacion import ResultadoImportacion, abrir_csv
+from .models import Categoria, Proveedor, Producto, MovimientoInventario, EventoSalida
+
+COLUMNAS = ["producto", "categoria", "proveedor", "sku", "cantidad", "costo_unitario", "precio_venta"]
+
+_NUMERO = r"^[+-]?([0-9]+(\.[0-9]*)?|\.[0-9]+)$"
+
+
+def _tablas():
+    return {
+        "categoria": Categoria._meta.db_table,
+        "proveedor": Proveedor._meta.db_table,
+        "producto": Producto._meta.db_table,
+        "movimiento": MovimientoInventario._meta.db_table,
+        "evento": EventoSalida._meta.db_table,
+    }
+
+
+def _copiar(cursor, reader):
+    """Copia las filas del CSV a carga_csv con COPY; devuelve cuántas se leyeron."""
+    cursor.execute("""
+        CREATE TEMP TABLE carga_csv (
+            linea bigint, producto text, categoria text, proveedor text,
+            sku text, cantidad text, costo_unitario text, precio_venta text
+        ) ON COMMIT DROP
+    """)
+    leidas = 0
+    with cursor.cursor.copy(
+        "COPY carga_csv (linea, producto, categoria, proveedor, sku, cantidad, costo_unitario, precio_venta) FROM STDIN"
+    ) as copy:
+        for num, fila in enumerate(reader, start=2):
+            fila_norm = {
+                (k or "").strip().lower(): v
+                for k, v in fila.items()
+                if isinstance(v, str)
+            }
+            copy.write_row([num] + [fila_norm.get(c) for c in COLUMNAS])
+            leidas += 1
+    return leidas
+
+
+def _validar(cursor, resultado, limite_errores):
+    """Pasa las filas válidas a `carga` con tipos; las demás se cuentan como rechazadas."""
+    cursor.execute(f"""
+        CREATE TEMP TABLE carga_rechazo ON COMMIT DROP AS
+        SELECT linea, CASE
+            WHEN NULLIF(btrim(producto), '') IS NULL THEN 'Falta el nombre del producto.'
+            WHEN btrim(coalesce(cantidad, '')) !~ '^[+-]?[0-9]{{1,9}}$' THEN 'Cantidad inválida.'
+            WHEN btrim(cantidad)::int <= 0 THEN 'La cantidad debe ser mayor que cero.'
+            WHEN NULLIF(btrim(costo_unitario), '') IS NOT NULL
+                 AND btrim(costo_unitario) !~ '{_NUMERO}' THEN 'Costo unitario inválido.'
+        END AS motivo
+        FROM carga_csv
+    """)
+    cursor.execute(f"""
+        CREATE TEMP TABLE carga ON COMMIT DROP AS
+        SELECT c.linea,
+               btrim(c.producto) AS producto,
+               NULLIF(btrim(c.categoria), '') AS categoria,
+               NULLIF(btrim(c.proveedor), '') AS proveedor,
+               NULLIF(btrim(c.sku), '') AS sku,
+               btrim(c.cantidad)::int AS cantidad,
+               round(coalesce(NULLIF(btrim(c.costo_unitario), ''), '0')::numeric, 2) AS costo_unitario,
+               CASE WHEN btrim(c.precio_venta) ~ '{_NUMERO}'
+                    THEN round(btrim(c.precio_venta)::numeric, 2) END AS precio_venta,
+               NULL::bigint AS categoria_id,
+               NULL::bigint AS proveedor_id,
+               NULL::bigint AS producto_id
+        FROM carga_csv c
+        JOIN carga_rechazo r USING (linea)
+        WHERE r.motivo IS NULL
+    """)
+    # Las tablas temporales no pasan por autovacuum: sin esto el planificador adivina
+    cursor.execute("ANALYZE carga")
+    cursor.execute("SELECT count(*) FROM carga_rechazo WHERE motivo IS NOT NULL")
+    resultado.filas_rechazadas += cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT linea, motivo FROM carga_rechazo WHERE motivo IS NOT NULL ORDER BY linea LIMIT %s",
+        [limite_errores],
+    )
+    resultado.errores.extend(cursor.fetchall())
+
+
+def _categorias_y_proveedores(cursor, t, resultado):
+    cursor.execute(f"""
+        INSERT INTO {t['categoria']} (nombre)
+        SELECT DISTINCT categoria FROM carga WHERE categoria IS NOT NULL
+        ON CONFLICT (nombre) DO NOTHING
+    """)
+    resultado.creadas_cat += cursor.rowcount
+    cursor.execute(f"""
+        UPDATE carga c SET categoria_id = cat.id
+        FROM {t['categoria']} cat WHERE cat.nombre = c.categoria
+    """)
+
+    # Proveedor.nombre no es único: se usa el más antiguo con ese nombre.
+    cursor.execute(f"""
+        INSERT INTO {t['proveedor']} (nombre)
+        SELECT DISTINCT c.proveedor FROM carga c
+        WHERE c.proveedor IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM {t['proveedor']} p WHERE p.nombre = c.proveedor)
+    """)
+    resultado.creados_prov += cursor.rowcount
+    cursor.execute(f"""
+        UPDATE carga c SET proveedor_id = p.id
+        FROM (SELECT nombre, min(id) AS id FROM {t['proveedor']} GROUP BY nombre) p
+        WHERE p.nombre = c.proveedor
+    """)
+
+
+def _resolver_productos(cursor, t):
+    """Asigna producto_id: por SKU, o por nombre (+ categoría si viene) como la importación web."""
+    cursor.execute(f"""
+        UPDATE carga c SET producto_id = p.id
+        FROM {t['producto']} p
+        WHERE c.producto_id IS NULL AND c.sku IS NOT NULL AND p.sku = c.sku
+    """)
+    cursor.execute(f"""
+        UPDATE carga c SET producto_id = p.id
+        FROM (
+            SELECT DISTINCT ON (lower(nombre), categoria_id) id, lower(nombre) AS nombre_l, categoria_id
+            FROM {t['producto']}
+            ORDER BY lower(nombre), categoria_id, nombre, id
+        ) p
+        WHERE c.producto_id IS NULL AND c.sku IS NULL AND c.categoria_id IS NOT NULL
+          AND p.nombre_l = lower(c.producto) AND p.categoria_id = c.categoria_id
+    """)
+    cursor.execute(f"""
+        UPDATE carga c SET producto_id = p.id
+        FROM (
+            SELECT DISTINCT ON (lower(nombre)) id, lower(nombre) AS nombre_l
+            FROM {t['producto']}
+            ORDER BY lower(nombre), nombre, id
+        ) p
+        WHERE c.producto_id IS NULL AND c.sku IS NULL AND c.categoria_id IS NULL
+          AND p.nombre_l = lower(c.producto)
+    """)
+
+
+def _crear_productos(cursor, t, resultado):
+    """Crea los productos que no existen, con los datos de su primera fila (como get_or_create)."""
+    cursor.execute("""
+        CREATE TEMP TABLE carga_nuevos ON COMMIT DROP AS
+        SELECT row_number() OVER (ORDER BY linea) AS n, sku IS NULL AS sin_sku, *
+        FROM (
+            SELECT DISTINCT ON (coalesce(sku, ''), CASE WHEN sku IS NULL THEN lower(producto) END, categoria_id)
+                   linea, producto, sku, categoria_id, proveedor_id, precio_venta
+            FROM carga
+            WHERE producto_id IS NULL AND categoria_id IS NOT NULL
+            ORDER BY coalesce(sku, ''), CASE WHEN sku IS NULL THEN lower(producto) END, categoria_id, linea
+        ) x
+    """)
+
+    # SKUs CSV-<n> reservados con el mismo contador que la importación web
+    while True:
+        cursor.execute("SELECT count(*) FROM carga_nuevos WHERE sku IS NULL")
+        faltan, = cursor.fetchone()
+        if not faltan:
+            break
+        inicio = versiones.reservar(versiones.SKU_CSV, faltan)
+        cursor.execute(
+            "UPDATE carga_nuevos SET sku = 'CSV-' || (%s + r.k - 1) "
+            "FROM (SELECT n, row_number() OVER (ORDER BY n) AS k FROM carga_nuevos WHERE sku IS NULL) r "
+            "WHERE carga_nuevos.n = r.n",
+            [inicio],
+        )
+        # Los que chocan con SKUs viejos vuelven a quedar sin SKU para otra vuelta
+        cursor.execute(f"""
+            UPDATE carga_nuevos n SET sku = NULL
+            FROM {t['producto']} p
+            WHERE p.sku = n.sku AND n.sin_sku
+        """)
+
+    cursor.execute(f"""
+        INSERT INTO {t['producto']}
+            (nombre, sku, categoria_id, proveedor_id, precio_venta, costo_promedio,
+             stock, stock_minimo, unidad, activo, updated_at)
+        SELECT producto, sku, categoria_id, proveedor_id, coalesce(precio_venta, 0), 0,
+               0, 0, 'und', true, now()
+        FROM carga_nuevos
+        ORDER BY n
+        ON CONFLICT (sku) DO NOTHING
+    """)
+    resultado.creados_prod += cursor.rowcount
+
+
+def _costos(cursor, t):
+    """
+    Costo promedio final de cada producto en carga_costo, aplicando las filas
+    una por una en el orden del archivo y redondeando en cada paso, igual
+    que importacion.aplicar_entrada (core/costos.py). La consulta recursiva
+    avanza una fila por producto en cada vuelta, todos los productos a la vez.
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE carga_orden ON COMMIT DROP AS
+        SELECT producto_id, row_number() OVER (PARTITION BY producto_id ORDER BY linea) AS n,
+               cantidad, costo_unitario
+        FROM carga
+        WHERE producto_id IS NOT NULL
+    """)
+    cursor.execute("CREATE INDEX ON carga_orden (producto_id, n)")
+    cursor.execute("ANALYZE carga_orden")
+    cursor.execute(f"""
+        CREATE TEMP TABLE carga_costo ON COMMIT DROP AS
+        WITH RECURSIVE paso (producto_id, n, stock, costo) AS (
+            SELECT id, 0::bigint, stock, costo_promedio::numeric
+            FROM {t['producto']}
+            WHERE id IN (SELECT producto_id FROM carga_orden)
+          UNION ALL
+            SELECT s.producto_id, o.n, s.stock + o.cantidad,
+                   CASE WHEN s.stock + o.cantidad = 0 THEN 0
+                        ELSE round((s.costo * s.stock + o.cantidad * o.costo_unitario) / (s.stock + o.cantidad), 2)
+                   END
+            FROM paso s
+            JOIN carga_orden o ON o.producto_id = s.producto_id AND o.n = s.n + 1
+        )
+        SELECT DISTINCT ON (producto_id) producto_id, costo
+        FROM paso
+        ORDER BY producto_id, n DESC
+    """)
+
+
+def _aplicar(cursor, t, motivo):
+    """Suma stock, recalcula costo promedio y registra los movimientos y eventos."""
+    # Bloqueo en orden de id, igual que la confirmación de venta
+    cursor.execute(f"""
+        SELECT id FROM {t['producto']}
+        WHERE id IN (SELECT producto_id FROM carga WHERE producto_id IS NOT NULL)
+        ORDER BY id FOR UPDATE
+    """)
+    # Stock previo de los que ya existían, para los eventos de stock mínimo
+    cursor.execute(f"""
+        CREATE TEMP TABLE carga_antes ON COMMIT DROP AS
+        SELECT id, stock FROM {t['producto']}
+        WHERE id IN (SELECT producto_id FROM carga WHERE producto_id IS NOT NULL)
+          AND sku NOT IN (SELECT sku FROM carga_nuevos)
+    """)
+    _costos(cursor, t)
+    cursor.execute(f"""
+        UPDATE {t['producto']} p SET
+            stock = p.stock + a.cantidad,
+            costo_promedio = c.costo,
+            categoria_id = coalesce(a.categoria_id, p.categoria_id),
+            proveedor_id = coalesce(a.proveedor_id, p.proveedor_id),
+            precio_venta = coalesce(a.precio_venta, p.precio_venta),
+            updated_at = now()
+        FROM (
+            SELECT producto_id,
+                   sum(cantidad) AS cantidad,
+                   sum(cantidad * costo_unitario) AS valor,
+                   (array_agg(categoria_id ORDER BY linea DESC) FILTER (WHERE categoria_id IS NOT NULL))[1] AS categoria_id,
+                   (array_agg(proveedor_id ORDER BY linea DESC) FILTER (WHERE proveedor_id IS NOT NULL))[1] AS proveedor_id,
+                   (array_agg(precio_venta ORDER BY linea DESC) FILTER (WHERE precio_venta IS NOT NULL))[1] AS precio_venta
+            FROM carga
+            WHERE producto_id IS NOT NULL
+            GROUP BY producto_id
+        ) a
+        JOIN carga_costo c USING (producto_id)
+        WHERE p.id = a.producto_id
+    """)
+    cursor.execute(f"""
+        INSERT INTO {t['movimiento']} (producto_id, tipo, cantidad, costo_unitario, motivo, fecha)
+        SELECT producto_id, 'ENTRADA', cantidad, costo_unitario, %s, now()
+        FROM carga
+        WHERE producto_id IS NOT NULL
+        ORDER BY linea
+    """, [motivo])
+    filas = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO {t['evento']} (tipo, datos, creado, intentos, proximo_intento, ultimo_error)
+        SELECT CASE WHEN p.stock > p.stock_minimo THEN %s ELSE %s END,
+               jsonb_build_object(
+                   'producto', p.id, 'sku', p.sku, 'nombre', p.nombre,
+                   'stock', p.stock, 'stock_minimo', p.stock_minimo
+               ),
+               now(), 0, now(), ''
+        FROM {t['producto']} p
+        JOIN carga_antes a ON a.id = p.id
+        WHERE p.activo AND (a.stock > p.stock_minimo) <> (p.stock > p.stock_minimo)
+        ORDER BY p.id
+    """, [EventoSalida.STOCK_REPUESTO, EventoSalida.STOCK_BAJO])
+    return filas
+
+
+def cargar_csv(archivo, motivo="CARGA CSV", limite_errores=100):
+    """
+    Carga un CSV de entradas con COPY y SQL sobre conjuntos, en una transacción.
+
+    El costo promedio sale igual que en la importación web: fila por fila
+    en el orden del archivo, con el mismo redondeo (ver _costos).
+    """
+    if connection.vendor != "postgresql":
+        raise RuntimeError("La carga masiva con COPY solo funciona con PostgreSQL.")
+
+    reader = abrir_csv(archivo)
+    resultado = ResultadoImportacion()
+    t = _tablas()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _copiar(cursor, reader)
+        _validar(cursor, resultado, limite_errores)
+        _categorias_y_proveedores(cursor, t, resultado)
+        _resolver_productos(cursor, t)
+        _crear_productos(cursor, t, resultado)
+        _resolver_productos(cursor, t)
+
+        cursor.execute(
+            "SELECT linea FROM carga WHERE producto_id IS NULL ORDER BY linea"
+        )
+        for (linea,) in cursor.fetchall():
+            resultado.rechazar(linea, "Producto nuevo sin categoría.")
+
+        resultado.filas_ok += _aplicar(cursor, t, motivo)
+        versiones.incrementar(versiones.CATALOGO)
+        versiones.incrementar_al_confirmar(versiones.INVENTARIO)
+        # ON COMMIT DROP no alcanza si nos llaman dentro de otra transacción
+        cursor.execute(
+            "DROP TABLE carga_costo, carga_orden, carga_antes, carga_nuevos, carga, carga_rechazo, carga_csv"
+        )
+
+    resultado.errores.sort()
+    return resultado
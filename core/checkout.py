@@ -0,0 +1,162 @@
+# core/checkout.py
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from . import eventos, versiones
+from .models import Producto, MovimientoInventario, Venta, VentaLinea
+from .reportes import acumular_ventas
+
+
+class StockInsuficiente(Exception):
+    """
+    La venta no se puede confirmar.
+    `faltantes` es una lista de (nombre, necesita, disponible);
+    los productos que ya no existen vienen con disponible=None.
+    """
+
+    def __init__(self, faltantes):
+        self.faltantes = faltantes
+        super().__init__(self.mensaje())
+
+    def mensaje(self):
+        partes = []
+        for nombre, need, have in self.faltantes:
+            if have is None:
+                partes.append(f"{nombre} (ya no existe)")
+            else:
+                partes.append(f"{nombre} (necesita {need}, disponible {have})")
+        return "Stock insuficiente para: " + ", ".join(partes)
+
+
+def _cantidades(cart):
+    """Agrupa el carrito en {producto_id: (qty, precio)}."""
+    lineas = {}
+    for pid, item in cart.items():
+        qty = int(item["qty"])
+        if qty > 0:
+            lineas[int(pid)] = (qty, Decimal(item["precio"]))
+    return lineas
+
+
+def confirmar_venta(cart, usuario=None):
+    """
+    Descuenta el stock del carrito, guarda la Venta con sus líneas (precio y
+    costo del momento) y registra las SALIDAS en bloque.
+
+    Siempre son las mismas consultas sin importar las líneas del carrito:
+      1. SELECT ... FOR UPDATE de todos los productos, ordenado por pk
+         (todas las cajas bloquean en el mismo orden => sin deadlocks).
+      2. UPDATE condicional (stock >= qty) con CASE por producto.
+      3. INSERT de la Venta y masivo de VentaLinea y MovimientoInventario.
+      4. Acumulado del día por producto y por categoría (core/reportes.py).
+
+    Devuelve (venta, resumen). Lanza StockInsuficiente si algo no alcanza,
+    en ese caso no se escribe nada.
+    """
+    lineas = _cantidades(cart)
+    ids = sorted(lineas)
+    if not ids:
+        return None, []
+
+    with transaction.atomic():
+        productos = {
+            p.pk: p
+            for p in Producto.objects.select_for_update().filter(pk__in=ids).order_by("pk")
+        }
+
+        faltantes = []
+        for pid in ids:
+            qty, _ = lineas[pid]
+            p = productos.get(pid)
+            if p is None:
+                faltantes.append((f"Producto #{pid}", qty, None))
+            elif p.stock < qty:
+                faltantes.append((p.nombre, qty, p.stock))
+        if faltantes:
+            raise StockInsuficiente(faltantes)
+
+        condicion = Q()
+        for pid in ids:
+            condicion |= Q(pk=pid, stock__gte=lineas[pid][0])
+        actualizados = Producto.objects.filter(condicion).update(
+            stock=Case(
+                *[When(pk=pid, then=F("stock") - lineas[pid][0]) for pid in ids],
+                default=F("stock"),
+            ),
+            updated_at=Now(),
+        )
+        if actualizados != len(ids):
+            # No debería pasar con las filas bloqueadas, pero si pasa no
+            # dejamos la venta a medias.
+            raise StockInsuficiente([
+                (productos[pid].nombre, lineas[pid][0], productos[pid].stock) for pid in ids
+            ])
+
+        detalle = []
+        for pid in ids:
+            qty, price = lineas[pid]
+            prod = productos[pid]
+            detalle.append(VentaLinea(
+                producto_id=pid,
+                categoria_id=prod.categoria_id,
+                nombre=prod.nombre,
+                sku=prod.sku,
+                cantidad=qty,
+                precio_unitario=price,
+                costo_unitario=prod.costo_promedio,
+                total=(price * qty).quantize(Decimal("0.01")),
+                costo_total=(prod.costo_promedio * qty).quantize(Decimal("0.01")),
+            ))
+
+        venta = Venta.objects.create(
+            usuario=usuario,
+            cantidad=sum(l.cantidad for l in detalle),
+            total=sum((l.total for l in detalle), Decimal("0.00")),
+            costo_total=sum((l.costo_total for l in detalle), Decimal("0.00")),
+        )
+        for l in detalle:
+            l.venta = venta
+            l.fecha = venta.fecha
+        VentaLinea.objects.bulk_create(detalle)
+
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(
+                producto_id=l.producto_id,
+                venta=venta,
+                tipo="SALIDA",
+                cantidad=l.cantidad,
+                costo_unitario=l.costo_unitario,
+                motivo="VENTA",
+            )
+            for l in detalle
+        ])
+
+        eventos.registrar([eventos.venta_confirmada(venta, detalle)] + [
+            eventos.cruce_de_minimo(
+                pid, productos[pid].sku, productos[pid].nombre,
+                productos[pid].stock, productos[pid].stock - lineas[pid][0],
+                productos[pid].stock_minimo, productos[pid].activo,
+            )
+            for pid in ids
+        ])
+
+        acumular_ventas(timezone.localdate(venta.fecha), [
+            (l.producto_id, l.categoria_id, l.cantidad, l.total, l.costo_total)
+            for l in detalle
+        ])
+        versiones.incrementar_al_confirmar(versiones.INVENTARIO)
+
+    resumen = [
+        {
+            "producto": f"{l.nombre} ({l.sku})",
+            "qty": l.cantidad,
+            "precio": str(l.precio_unitario),
+            "subtotal": float(l.total),
+        }
+        for l in detalle
+    ]
+    return venta, resumen
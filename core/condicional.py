@@ -0,0 +1,67 @@
+# core/condicional.py
+"""
+GET condicional para la API del catálogo.
+
+La versión es el contador versiones.INVENTARIO, que sube con cualquier
+cambio de productos, stock, categorías o proveedores, y su fecha de
+actualización. Con If-None-Match / If-Modified-Since vigentes se responde
+304 después de una sola consulta, sin tocar los productos ni serializar.
+
+Last-Modified tiene resolución de un segundo: si la versión cambió hace
+menos de un segundo no se manda (ni se usa con If-Modified-Since), porque
+otro cambio en ese mismo segundo quedaría con la misma fecha.
+"""
+from datetime import timedelta
+
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from . import versiones
+from .models import Contador
+
+
+def version_catalogo():
+    """(valor, actualizado) del contador de inventario."""
+    fila = (
+        Contador.objects
+        .filter(nombre=versiones.INVENTARIO)
+        .values_list("valor", "actualizado")
+        .first()
+    )
+    return fila or (0, None)
+
+
+class GetCondicionalMixin:
+    """Para vistas de DRF: list y retrieve con ETag / Last-Modified del catálogo."""
+
+    def version_condicional(self):
+        """(versión para el ETag, fecha de última modificación o None)."""
+        valor, actualizado = version_catalogo()
+        return f"{versiones.INVENTARIO}-{valor}", actualizado
+
+    def _condicional(self, request, generar):
+        self.version_actual, actualizado = self.version_condicional()
+        # El formato entra en el ETag: JSON y la API navegable no son el mismo cuerpo
+        etag = f'"{self.version_actual}-{request.accepted_renderer.format}"'
+        ultima = None
+        if actualizado and actualizado <= timezone.now() - timedelta(seconds=1):
+            ultima = int(actualizado.timestamp())
+
+        respuesta = get_conditional_response(request, etag=etag, last_modified=ultima)
+        if respuesta is None:
+            respuesta = generar()
+        if respuesta.status_code in (200, 304):
+            respuesta["ETag"] = etag
+            if ultima is not None:
+                respuesta["Last-Modified"] = http_date(ultima)
+        return respuesta
+
+    def list(self, request, *args, **kwargs):
+        return self._condicional(request, lambda: super(GetCondicionalMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Primero el objeto: un pk que no existe da 404, nunca 304
+        instancia = self.get_object()
+        return self._condicional(request, lambda: Response(self.get_serializer(instancia).data))
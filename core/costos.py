@@ -0,0 +1,46 @@
+# core/costos.py
+"""
+Costo promedio ponderado después de una entrada, en Python (importación
+web) y como expresión SQL (entradas del formulario). Las dos redondean a
+centavos con la mitad lejos de cero, que es lo que hace round(numeric, 2)
+en PostgreSQL, así una misma recepción da el mismo costo por cualquier
+camino. Si el stock nuevo queda en cero el costo pasa a 0.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
+from django.db.models.functions import Round
+
+CENTAVO = Decimal("0.01")
+_DINERO = DecimalField(max_digits=18, decimal_places=2)
+
+
+def redondear(valor):
+    """`valor` a centavos, con la mitad lejos de cero (igual que round() de PostgreSQL)."""
+    return Decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def costo_promedio(costo, stock, cantidad, valor):
+    """Costo promedio de `stock` unidades a `costo` más `cantidad` unidades que costaron `valor`."""
+    nuevo_stock = stock + cantidad
+    if not nuevo_stock:
+        return Decimal("0.00")
+    return redondear((Decimal(costo) * stock + Decimal(valor)) / nuevo_stock)
+
+
+def costo_promedio_sql(cantidad, valor):
+    """
+    La misma cuenta que costo_promedio() como expresión SQL. Se evalúa
+    contra la fila en el mismo UPDATE, con el stock de ese momento.
+    """
+    return Case(
+        When(stock=-cantidad, then=Value(Decimal("0.00"))),
+        default=Round(
+            ExpressionWrapper(
+                (F("costo_promedio") * F("stock") + Value(valor)) / (F("stock") + cantidad),
+                output_field=_DINERO,
+            ),
+            2,
+        ),
+        output_field=_DINERO,
+    )
@@ -0,0 +1,130 @@
+# core/despacho.py
+"""
+Entrega de la bandeja de salida por webhook (manage.py despachar_eventos).
+
+Cada lote pasa por tres pasos para no tener una transacción abierta (ni
+filas bloqueadas) mientras se espera al webhook:
+
+  1. se reserva: con SKIP LOCKED se toman los eventos listos, se les suma
+     un intento y se corre proximo_intento a RESERVA; se confirma;
+  2. se manda en un solo POST JSON firmado con HMAC, fuera de transacción;
+  3. se marcan enviados o se reprograman con espera exponencial.
+
+Si el despachador muere entre 1 y 3, la reserva vence y otro retoma el
+lote. Después de MAX_INTENTOS fallos el evento queda `descartado` y no se
+reintenta más (se ve en ultimo_error). La entrega es "al menos una vez":
+el consumidor debe ignorar ids repetidos.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+from datetime import timedelta
+
+import requests
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EventoSalida
+
+logger = logging.getLogger(__name__)
+
+LOTE = 100
+ESPERA_BASE = 30            # segundos antes del primer reintento
+ESPERA_MAXIMA = 60 * 60     # tope de la espera entre reintentos
+TIMEOUT = 10
+RESERVA = timedelta(seconds=TIMEOUT * 6)    # cuánto queda tomado un lote
+MAX_INTENTOS = 12           # ~8 horas de reintentos antes de descartar
+
+
+def firmar(cuerpo, secreto):
+    return "sha256=" + hmac.new(secreto.encode(), cuerpo, hashlib.sha256).hexdigest()
+
+
+def enviar_http(url, cuerpo, headers, timeout=TIMEOUT):
+    requests.post(url, data=cuerpo, headers=headers, timeout=timeout).raise_for_status()
+
+
+def espera(intentos):
+    """Segundos hasta el próximo intento, con un 10 % de variación al azar."""
+    segundos = min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA)
+    return segundos * random.uniform(0.9, 1.1)
+
+
+def reservar(lote=LOTE):
+    """
+    Toma hasta `lote` eventos listos y los deja reservados por RESERVA.
+    Los que ya agotaron los intentos (el despachador murió con ellos) se
+    descartan acá.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        eventos = list(
+            EventoSalida.objects
+            .select_for_update(skip_locked=True)
+            .filter(enviado__isnull=True, descartado__isnull=True, proximo_intento__lte=ahora)
+            .order_by("id")[:lote]
+        )
+        agotados = [e.pk for e in eventos if e.intentos >= MAX_INTENTOS]
+        if agotados:
+            EventoSalida.objects.filter(pk__in=agotados).update(descartado=ahora)
+            logger.warning("Eventos descartados sin respuesta del webhook: %s", agotados)
+        eventos = [e for e in eventos if e.intentos < MAX_INTENTOS]
+        EventoSalida.objects.filter(pk__in=[e.pk for e in eventos]).update(
+            intentos=F("intentos") + 1, proximo_intento=ahora + RESERVA,
+        )
+    for evento in eventos:
+        evento.intentos += 1
+    return eventos
+
+
+def despachar_lote(url, secreto="", lote=LOTE, enviar=enviar_http):
+    """
+    Envía un lote de eventos listos. Devuelve (enviados, fallidos);
+    (0, 0) si no había nada que mandar.
+    """
+    eventos = reservar(lote)
+    if not eventos:
+        return 0, 0
+
+    cuerpo = json.dumps(
+        {"eventos": [
+            {"id": e.pk, "tipo": e.tipo, "creado": e.creado, "datos": e.datos}
+            for e in eventos
+        ]},
+        cls=DjangoJSONEncoder,
+    ).encode()
+    headers = {"Content-Type": "application/json"}
+    if secreto:
+        headers["X-Placacenter-Firma"] = firmar(cuerpo, secreto)
+
+    try:
+        enviar(url, cuerpo, headers)
+    except Exception as e:
+        ahora = timezone.now()
+        for evento in eventos:
+            evento.ultimo_error = str(e)[:1000]
+            if evento.intentos >= MAX_INTENTOS:
+                evento.descartado = ahora
+            else:
+                evento.proximo_intento = ahora + timedelta(seconds=espera(evento.intentos))
+        EventoSalida.objects.bulk_update(eventos, ["proximo_intento", "ultimo_error", "descartado"])
+        descartados = [e.pk for e in eventos if e.descartado]
+        if descartados:
+            logger.warning("Eventos descartados tras %s intentos: %s", MAX_INTENTOS, descartados)
+        return 0, len(eventos)
+
+    EventoSalida.objects.filter(pk__in=[e.pk for e in eventos]).update(
+        enviado=timezone.now(), ultimo_error="",
+    )
+    return len(eventos), 0
+
+
+def purgar_enviados(dias):
+    """Borra los eventos ya entregados hace más de `dias` días."""
+    limite = timezone.now() - timedelta(days=dias)
+    borrados, _ = EventoSalida.objects.filter(enviado__lt=limite).delete()
+    return borrados
@@ -0,0 +1,96 @@
+# core/entradas.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Now
+
+from . import eventos, versiones
+from .costos import costo_promedio_sql
+from .models import Producto, MovimientoInventario
+
+
+class ProductosInexistentes(Exception):
+    def __init__(self, ids):
+        super().__init__(f"Productos inexistentes: {', '.join(map(str, ids))}")
+        self.ids = ids
+
+
+def registrar_recepcion(lineas, motivo=None):
+    """
+    Aplica una recepción de N líneas (producto_id, cantidad, costo_unitario)
+    en una transacción y con pocas consultas sin importar cuántas líneas sean:
+    bloqueo de los productos en orden de pk, un UPDATE con CASE para stock y
+    costo promedio (calculados en la base sobre la fila bloqueada) y un INSERT
+    masivo de movimientos (más los eventos de stock mínimo que crucen). Si un
+    producto aparece varias veces se suman sus líneas. Lanza ProductosInexistentes sin escribir nada si falta alguno.
+    """
+    lineas = list(lineas)
+    por_producto = defaultdict(lambda: [0, Decimal("0.00")])
+    for pid, cantidad, costo_unitario in lineas:
+        por_producto[pid][0] += cantidad
+        por_producto[pid][1] += Decimal(costo_unitario) * cantidad
+    ids = sorted(por_producto)
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        # Con las filas bloqueadas, este stock es el que verá el UPDATE
+        existentes = {
+            fila[0]: fila
+            for fila in (
+                Producto.objects.select_for_update()
+                .filter(pk__in=ids)
+                .order_by("pk")
+                .values_list("pk", "sku", "nombre", "stock", "stock_minimo", "activo")
+            )
+        }
+        faltan = [pid for pid in ids if pid not in existentes]
+        if faltan:
+            raise ProductosInexistentes(faltan)
+
+        Producto.objects.filter(pk__in=ids).update(
+            costo_promedio=Case(
+                *[
+                    When(pk=pid, then=costo_promedio_sql(cant, valor))
+                    for pid, (cant, valor) in por_producto.items()
+                ],
+                default=F("costo_promedio"),
+            ),
+            stock=Case(
+                *[When(pk=pid, then=F("stock") + cant) for pid, (cant, _) in por_producto.items()],
+                default=F("stock"),
+            ),
+            updated_at=Now(),
+        )
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(
+                producto_id=pid,
+                tipo="ENTRADA",
+                cantidad=cantidad,
+                costo_unitario=costo_unitario,
+                motivo=motivo,
+            )
+            for pid, cantidad, costo_unitario in lineas
+        ])
+        eventos.registrar(
+            eventos.cruce_de_minimo(pid, sku, nombre, stock, stock + por_producto[pid][0], minimo, activo)
+            for pid, sku, nombre, stock, minimo, activo in existentes.values()
+        )
+        # update() no dispara las señales de Producto
+        versiones.incrementar_al_confirmar(versiones.INVENTARIO)
+    return len(lineas)
+
+
+def registrar_entrada(producto_id, cantidad, costo_unitario, motivo=None):
+    """
+    Suma una entrada al stock; stock y costo promedio se calculan en la base
+    sobre la fila bloqueada, así dos entradas simultáneas del mismo producto
+    no se pisan. Devuelve False si el producto no existe.
+    """
+    try:
+        registrar_recepcion([(producto_id, cantidad, costo_unitario)], motivo)
+    except ProductosInexistentes:
+        return False
+    return True
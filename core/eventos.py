@@ -0,0 +1,46 @@
+# core/eventos.py
+"""
+Eventos para la bandeja de salida (EventoSalida). Se crean dentro de la
+transacción del cambio: si la venta o la entrada se deshace, el evento
+también. Los entrega core/despacho.py.
+"""
+from .models import EventoSalida
+
+
+def cruce_de_minimo(producto_id, sku, nombre, antes, despues, minimo, activo=True):
+    """Evento si el stock cruzó stock_minimo en esta operación; None si no."""
+    if not activo:
+        return None
+    if antes > minimo >= despues:
+        tipo = EventoSalida.STOCK_BAJO
+    elif antes <= minimo < despues:
+        tipo = EventoSalida.STOCK_REPUESTO
+    else:
+        return None
+    return EventoSalida(tipo=tipo, datos={
+        "producto": producto_id,
+        "sku": sku,
+        "nombre": nombre,
+        "stock": despues,
+        "stock_minimo": minimo,
+    })
+
+
+def venta_confirmada(venta, lineas):
+    return EventoSalida(tipo=EventoSalida.VENTA_CONFIRMADA, datos={
+        "venta": venta.pk,
+        "fecha": venta.fecha.isoformat(),
+        "cantidad": venta.cantidad,
+        "total": str(venta.total),
+        "lineas": [
+            {"producto": l.producto_id, "sku": l.sku, "cantidad": l.cantidad, "total": str(l.total)}
+            for l in lineas
+        ],
+    })
+
+
+def registrar(eventos):
+    """Guarda los eventos (ignora los None) con un solo INSERT."""
+    eventos = [e for e in eventos if e is not None]
+    if eventos:
+        EventoSalida.objects.bulk_create(eventos)
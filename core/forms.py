@@ -48,3 +48,19 @@ class EntradaStockForm(forms.Form):
         widget=forms.NumberInput(attrs={"class": "form-control", "step": "0.01"})
     )
     motivo = forms.CharField(required=False, widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Motivo (opcional)"}))
+
+
+class LineaRecepcionForm(forms.Form):
+    sku = forms.CharField(max_length=50, widget=forms.TextInput(attrs={"class": "form-control form-control-sm", "placeholder": "SKU"}))
+    cantidad = forms.IntegerField(min_value=1, widget=forms.NumberInput(attrs={"class": "form-control form-control-sm", "min": "1"}))
+    costo_unitario = forms.DecimalField(
+        min_value=0, decimal_places=2, max_digits=12,
+        widget=forms.NumberInput(attrs={"class": "form-control form-control-sm", "step": "0.01"})
+    )
+
+
+LineasRecepcionFormSet = forms.formset_factory(LineaRecepcionForm, extra=10, max_num=500, validate_max=True)
+
+
+class RecepcionForm(forms.Form):
+    motivo = forms.CharField(max_length=120, required=False, widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Ej. Factura 1234 - Pavco"}))
@@ -0,0 +1,404 @@
+# core/importacion.py
+import codecs
+import csv
+import io
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import eventos, versiones
+from .costos import costo_promedio, redondear
+from .models import Categoria, Proveedor, Producto, MovimientoInventario
+
+COLUMNAS_OBLIGATORIAS = ["producto", "categoria", "proveedor", "cantidad", "costo_unitario"]
+
+TAMANO_BLOQUE = 64 * 1024   # bytes que se miran para detectar codificación y separador
+TAMANO_LOTE = 1000          # filas por transacción
+MAX_ERRORES = 100           # errores de fila que se guardan con detalle
+MAX_ENTERO = 2**31 - 1      # tope de las columnas integer de PostgreSQL
+
+
+class FilaInvalida(Exception):
+    pass
+
+
+class ArchivoInvalido(Exception):
+    pass
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.filas_ok = 0
+        self.filas_rechazadas = 0
+        self.creadas_cat = 0
+        self.creados_prov = 0
+        self.creados_prod = 0
+        self.errores = []  # (número de fila, mensaje), solo los primeros MAX_ERRORES
+
+    def rechazar(self, num, mensaje):
+        self.filas_rechazadas += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((num, mensaje))
+
+    def mensaje(self):
+        return (
+            f"CSV procesado. Filas correctas: {self.filas_ok}. "
+            f"Filas rechazadas: {self.filas_rechazadas}. "
+            f"Nuevas categorías: {self.creadas_cat}. Nuevos proveedores: {self.creados_prov}. "
+            f"Nuevos productos: {self.creados_prod}."
+        )
+
+    def mensaje_errores(self, limite=10):
+        if not self.errores:
+            return ""
+        detalle = "; ".join(f"fila {num}: {msg}" for num, msg in self.errores[:limite])
+        if self.filas_rechazadas > limite:
+            detalle += f"; y {self.filas_rechazadas - limite} más"
+        return "Filas con errores: " + detalle
+
+
+def _texto(fila_norm, columna, modelo, campo, etiqueta):
+    """Valor de la columna; FilaInvalida si no cabe en el campo del modelo."""
+    valor = fila_norm.get(columna, "")
+    largo = modelo._meta.get_field(campo).max_length
+    if len(valor) > largo:
+        raise FilaInvalida(f"{etiqueta} demasiado largo (máximo {largo} caracteres).")
+    return valor
+
+
+def _decimal(texto):
+    """Decimal a 2 decimales; InvalidOperation si no es un número."""
+    valor = redondear(Decimal(texto))
+    if valor.is_nan():
+        raise InvalidOperation
+    return valor
+
+
+def _cabe(valor, modelo, campo):
+    """True si `valor` entra en el DecimalField `campo` del modelo."""
+    campo = modelo._meta.get_field(campo)
+    return abs(valor) < 10 ** (campo.max_digits - campo.decimal_places)
+
+
+def leer_fila(fila):
+    """
+    Limpia una fila del csv.DictReader y la convierte en un registro para
+    importar_filas. Lanza FilaInvalida si la fila no se puede usar, también
+    si un valor no cabe en su columna: así un valor fuera de rango rechaza
+    solo su fila y no corta la importación a mitad de camino.
+    """
+    fila_norm = {
+        (k or "").strip().lower(): (v or "").strip()
+        for k, v in fila.items()
+        if isinstance(v, str) or v is None
+    }
+
+    nombre_prod = _texto(fila_norm, "producto", Producto, "nombre", "Nombre del producto")
+    if not nombre_prod:
+        raise FilaInvalida("Falta el nombre del producto.")
+    categoria = _texto(fila_norm, "categoria", Categoria, "nombre", "Nombre de la categoría")
+    proveedor = _texto(fila_norm, "proveedor", Proveedor, "nombre", "Nombre del proveedor")
+    sku = _texto(fila_norm, "sku", Producto, "sku", "SKU")
+
+    try:
+        cantidad = int(fila_norm.get("cantidad") or "0")
+    except ValueError:
+        raise FilaInvalida(f"Cantidad inválida: {fila_norm.get('cantidad')!r}.")
+    if cantidad <= 0:
+        raise FilaInvalida("La cantidad debe ser mayor que cero.")
+    if cantidad > MAX_ENTERO:
+        raise FilaInvalida(f"Cantidad fuera de rango: {cantidad}.")
+
+    try:
+        costo_unitario = _decimal(fila_norm.get("costo_unitario") or "0")
+    except InvalidOperation:
+        raise FilaInvalida(f"Costo unitario inválido: {fila_norm.get('costo_unitario')!r}.")
+    if not _cabe(costo_unitario, Producto, "costo_promedio"):
+        raise FilaInvalida(f"Costo unitario fuera de rango: {costo_unitario}.")
+
+    precio_venta = None
+    if fila_norm.get("precio_venta"):
+        try:
+            precio_venta = _decimal(fila_norm["precio_venta"])
+        except InvalidOperation:
+            precio_venta = None
+        if precio_venta is not None and not _cabe(precio_venta, Producto, "precio_venta"):
+            raise FilaInvalida(f"Precio de venta fuera de rango: {precio_venta}.")
+
+    return {
+        "producto": nombre_prod,
+        "categoria": categoria,
+        "proveedor": proveedor,
+        "sku": sku,
+        "cantidad": cantidad,
+        "costo_unitario": costo_unitario,
+        "precio_venta": precio_venta,
+    }
+
+
+def _asegurar_categorias(nombres, resultado):
+    existentes = {c.nombre: c for c in Categoria.objects.filter(nombre__in=nombres)}
+    faltan = [n for n in sorted(nombres) if n not in existentes]
+    if faltan:
+        Categoria.objects.bulk_create([Categoria(nombre=n) for n in faltan], ignore_conflicts=True)
+        existentes.update({c.nombre: c for c in Categoria.objects.filter(nombre__in=faltan)})
+        resultado.creadas_cat += len(faltan)
+    return existentes
+
+
+def _asegurar_proveedores(nombres, resultado):
+    existentes = {}
+    for prov in Proveedor.objects.filter(nombre__in=nombres).order_by("pk"):
+        existentes.setdefault(prov.nombre, prov)
+    faltan = [n for n in sorted(nombres) if n not in existentes]
+    if faltan:
+        creados = Proveedor.objects.bulk_create([Proveedor(nombre=n) for n in faltan])
+        existentes.update({p.nombre: p for p in creados})
+        resultado.creados_prov += len(faltan)
+    return existentes
+
+
+def _generador_sku(skus_archivo, bloque=100):
+    """
+    SKUs CSV-<n> para productos sin SKU. Los números se reservan en bloques
+    con el contador 'sku_csv' (seguro con importaciones simultáneas) y se
+    saltan los que ya existan de cargas anteriores.
+    """
+    usados = set(skus_archivo)
+    while True:
+        inicio = versiones.reservar(versiones.SKU_CSV, bloque)
+        candidatos = [f"CSV-{n}" for n in range(inicio, inicio + bloque)]
+        existentes = set(Producto.objects.filter(sku__in=candidatos).values_list("sku", flat=True))
+        for sku in candidatos:
+            if sku not in existentes and sku not in usados:
+                usados.add(sku)
+                yield sku
+
+
+def aplicar_entrada(producto, cantidad, costo_unitario):
+    """Suma una entrada al stock y recalcula el costo promedio ponderado (en memoria)."""
+    producto.costo_promedio = costo_promedio(
+        producto.costo_promedio, producto.stock, cantidad, Decimal(costo_unitario) * cantidad,
+    )
+    producto.stock += cantidad
+
+
+def importar_filas(registros, resultado=None, motivo="CARGA CSV"):
+    """
+    Importa registros de leer_fila() en una sola transacción con escrituras en bloque.
+
+      - Precarga categorías, proveedores y productos en diccionarios
+        (los productos existentes quedan bloqueados, en orden de pk).
+      - Crea lo que falte con bulk_create.
+      - Calcula stock y costo promedio en memoria, fila por fila y en el orden
+        del archivo, aunque el mismo producto aparezca varias veces.
+      - Escribe con bulk_update y un INSERT masivo de movimientos.
+
+    `registros` es una lista de (número de fila, registro).
+    """
+    resultado = resultado or ResultadoImportacion()
+    if not registros:
+        return resultado
+
+    skus = {r["sku"] for _, r in registros if r["sku"]}
+    nombres_sin_sku = {r["producto"].lower() for _, r in registros if not r["sku"]}
+
+    with transaction.atomic():
+        categorias = _asegurar_categorias({r["categoria"] for _, r in registros if r["categoria"]}, resultado)
+        proveedores = _asegurar_proveedores({r["proveedor"] for _, r in registros if r["proveedor"]}, resultado)
+
+        por_sku = {
+            p.sku: p
+            for p in Producto.objects.select_for_update().filter(sku__in=skus).order_by("pk")
+        }
+        por_nombre = defaultdict(list)
+        if nombres_sin_sku:
+            encontrados = (
+                Producto.objects.select_for_update()
+                .annotate(nombre_l=Lower("nombre"))
+                .filter(nombre_l__in=nombres_sin_sku)
+                .order_by("pk")
+            )
+            for p in sorted(encontrados, key=lambda p: (p.nombre, p.pk)):
+                # Si ya se cargó por SKU usamos la misma instancia
+                p = por_sku.get(p.sku, p)
+                por_nombre[p.nombre.lower()].append(p)
+
+        nuevos_sku = _generador_sku(skus)
+        nuevos = []
+        tocados = {}
+        stock_antes = {}
+        entradas = []
+
+        for num, r in registros:
+            categoria = categorias.get(r["categoria"]) if r["categoria"] else None
+            proveedor = proveedores.get(r["proveedor"]) if r["proveedor"] else None
+
+            if r["sku"]:
+                producto = por_sku.get(r["sku"])
+            else:
+                producto = next(
+                    (p for p in por_nombre[r["producto"].lower()]
+                     if categoria is None or p.categoria_id == categoria.pk),
+                    None,
+                )
+
+            if producto is None:
+                if categoria is None:
+                    resultado.rechazar(num, "Producto nuevo sin categoría.")
+                    continue
+                producto = Producto(
+                    nombre=r["producto"],
+                    sku=r["sku"] or next(nuevos_sku),
+                    categoria=categoria,
+                    proveedor=proveedor,
+                    precio_venta=r["precio_venta"] or Decimal("0.00"),
+                )
+                nuevos.append(producto)
+                if r["sku"]:
+                    por_sku[r["sku"]] = producto
+                else:
+                    por_nombre[r["producto"].lower()].append(producto)
+            elif producto.pk is not None:
+                tocados[producto.pk] = producto
+                stock_antes.setdefault(producto.pk, producto.stock)
+
+            # Actualizamos datos básicos
+            if categoria:
+                producto.categoria = categoria
+            if proveedor:
+                producto.proveedor = proveedor
+            if r["precio_venta"] is not None:
+                producto.precio_venta = r["precio_venta"]
+
+            aplicar_entrada(producto, r["cantidad"], r["costo_unitario"])
+            entradas.append((producto, r["cantidad"], r["costo_unitario"]))
+
+        Producto.objects.bulk_create(nuevos)
+        ahora = timezone.now()
+        for producto in tocados.values():
+            producto.updated_at = ahora
+        Producto.objects.bulk_update(
+            list(tocados.values()),
+            ["categoria", "proveedor", "precio_venta", "stock", "costo_promedio", "updated_at"],
+            batch_size=1000,
+        )
+        MovimientoInventario.objects.bulk_create(
+            [
+                MovimientoInventario(
+                    producto=producto,
+                    tipo="ENTRADA",
+                    cantidad=cantidad,
+                    costo_unitario=costo_unitario,
+                    motivo=motivo,
+                )
+                for producto, cantidad, costo_unitario in entradas
+            ],
+            batch_size=1000,
+        )
+        eventos.registrar(
+            eventos.cruce_de_minimo(
+                p.pk, p.sku, p.nombre, stock_antes[p.pk], p.stock, p.stock_minimo, p.activo,
+            )
+            for p in tocados.values()
+        )
+        # bulk_create/bulk_update no disparan las señales de Producto
+        versiones.incrementar(versiones.CATALOGO)
+        versiones.incrementar_al_confirmar(versiones.INVENTARIO)
+
+    resultado.creados_prod += len(nuevos)
+    resultado.filas_ok += len(entradas)
+    return resultado
+
+
+def _codificacion(archivo):
+    """
+    "utf-8-sig" si todo el archivo es UTF-8 válido, si no "latin1". Se
+    recorre entero por bloques antes de importar nada: los lotes se
+    confirman a medida que se leen y no se podría volver a empezar.
+    """
+    archivo.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        while bloque := archivo.read(TAMANO_BLOQUE):
+            decoder.decode(bloque)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin1"
+    return "utf-8-sig"
+
+
+def abrir_csv(archivo):
+    """
+    Prepara un csv.DictReader que lee el archivo subido por partes.
+    El separador se detecta con el primer bloque. La codificación es UTF-8
+    si todo el archivo lo es y si no latin1 (ver _codificacion), así nunca
+    se guardan caracteres de reemplazo.
+    Lanza ArchivoInvalido si el archivo está vacío o le faltan columnas.
+    """
+    archivo.seek(0)
+    inicio = archivo.read(TAMANO_BLOQUE)
+    if not inicio.strip():
+        raise ArchivoInvalido("El archivo está vacío.")
+
+    encoding = _codificacion(archivo)
+
+    muestra = inicio.decode(encoding, errors="ignore")
+    lineas = muestra.splitlines()
+    if len(lineas) > 1 and len(inicio) == TAMANO_BLOQUE:
+        lineas = lineas[:-1]  # la última puede estar cortada
+    try:
+        delimiter = csv.Sniffer().sniff("\n".join(lineas), delimiters=",;\t").delimiter
+    except csv.Error:
+        primera_linea = lineas[0] if lineas else ""
+        delimiter = ";" if ";" in primera_linea and "," not in primera_linea else ","
+
+    archivo.seek(0)
+    # newline="": solo \r y \n terminan una fila (0x85 en latin1 es "…", no un salto)
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline="")
+    reader = csv.DictReader(texto, delimiter=delimiter)
+
+    if not reader.fieldnames:
+        raise ArchivoInvalido("No se encontraron encabezados en el CSV.")
+
+    # Normalizamos nombres de columnas (quitamos espacios y pasamos a minúsculas)
+    headers = {(h or "").strip().lower() for h in reader.fieldnames}
+    if not set(COLUMNAS_OBLIGATORIAS).issubset(headers):
+        raise ArchivoInvalido(
+            "El CSV debe tener las columnas: producto, categoria, proveedor, cantidad, costo_unitario. "
+            "Opcionales: sku, precio_venta."
+        )
+    return reader
+
+
+def procesar_csv(archivo, tamano_lote=TAMANO_LOTE, al_avanzar=None):
+    """
+    Importa un CSV de entradas en lotes de `tamano_lote` filas, una
+    transacción por lote. En memoria solo hay un lote a la vez, sin importar
+    el tamaño del archivo. Las filas inválidas quedan en resultado.errores.
+    `al_avanzar(resultado, filas_leidas)` se llama después de cada lote.
+    """
+    reader = abrir_csv(archivo)
+    resultado = ResultadoImportacion()
+    lote = []
+    leidas = 0
+    for num, fila in enumerate(reader, start=2):
+        leidas += 1
+        try:
+            lote.append((num, leer_fila(fila)))
+        except FilaInvalida as e:
+            resultado.rechazar(num, str(e))
+            continue
+        if len(lote) >= tamano_lote:
+            importar_filas(lote, resultado)
+            lote = []
+            if al_avanzar:
+                al_avanzar(resultado, leidas)
+    if lote:
+        importar_filas(lote, resultado)
+    if al_avanzar:
+        al_avanzar(resultado, leidas)
+    return resultado
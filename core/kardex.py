@@ -0,0 +1,139 @@
+# core/kardex.py
+"""
+Kardex de un producto: sus movimientos en orden (fecha, id) con el saldo
+en unidades, el valor y el costo promedio acumulados.
+
+Los acumulados salen de funciones de ventana (SUM ... OVER) en la misma
+consulta que lee los movimientos, por el índice core_mov_producto_fecha.
+La paginación es por llave (fecha, id): el cursor de la página siguiente
+lleva la posición y los acumulados hasta ahí (firmado), así cada página
+lee solo sus filas aunque el producto tenga cientos de miles de
+movimientos. Con `desde` el saldo inicial es una suma sobre el mismo
+índice.
+"""
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, IntegerField, Q, RowRange, Sum, Value, When, Window,
+)
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from .models import MovimientoInventario
+
+TAMANO = 100
+MAX_TAMANO = 1000
+CENTAVO = Decimal("0.01")
+
+_UNIDADES = Case(
+    When(tipo="ENTRADA", then=F("cantidad")),
+    default=F("cantidad") * -1,
+    output_field=IntegerField(),
+)
+_VALOR = ExpressionWrapper(
+    _UNIDADES * F("costo_unitario"),
+    output_field=DecimalField(max_digits=18, decimal_places=2),
+)
+_ORDEN = [F("fecha").asc(), F("id").asc()]
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def saldo_inicial(producto_id, antes):
+    """(unidades, valor) de los movimientos anteriores a `antes`."""
+    totales = (
+        MovimientoInventario.objects
+        .filter(producto_id=producto_id, fecha__lt=antes)
+        .aggregate(
+            saldo=Coalesce(Sum(_UNIDADES), 0),
+            valor=Coalesce(Sum(_VALOR), Value(Decimal("0.00"))),
+        )
+    )
+    return totales["saldo"], totales["valor"]
+
+
+def movimientos(producto_id, desde=None, despues=None):
+    """
+    Movimientos en orden con los acumulados de la ventana (`saldo`, `valor`)
+    contados desde la primera fila leída. `despues` = (fecha, id) excluido.
+    """
+    qs = MovimientoInventario.objects.filter(producto_id=producto_id)
+    if despues:
+        fecha, mid = despues
+        # fecha__gte deja el rango en el índice; el OR solo desempata la fecha
+        qs = qs.filter(fecha__gte=fecha).filter(Q(fecha__gt=fecha) | Q(id__gt=mid))
+    elif desde:
+        qs = qs.filter(fecha__gte=desde)
+    return (
+        qs.order_by("fecha", "id")
+        .annotate(
+            saldo=Window(Sum(_UNIDADES), order_by=_ORDEN, frame=RowRange(start=None, end=0)),
+            valor=Window(Sum(_VALOR), order_by=_ORDEN, frame=RowRange(start=None, end=0)),
+        )
+        .values("id", "fecha", "tipo", "motivo", "cantidad", "costo_unitario", "venta_id", "saldo", "valor")
+    )
+
+
+def _fila(m, saldo, valor):
+    saldo += m["saldo"]
+    valor += m["valor"]
+    entrada = m["tipo"] == "ENTRADA"
+    return {
+        "id": m["id"],
+        "fecha": m["fecha"],
+        "tipo": m["tipo"],
+        "motivo": m["motivo"],
+        "venta": m["venta_id"],
+        "entrada": m["cantidad"] if entrada else 0,
+        "salida": 0 if entrada else m["cantidad"],
+        "costo_unitario": m["costo_unitario"],
+        "saldo": saldo,
+        "valor": valor,
+        "costo_promedio": (valor / saldo).quantize(CENTAVO) if saldo > 0 else None,
+    }
+
+
+def _cursor(producto_id, fila):
+    return signing.dumps(
+        [producto_id, fila["fecha"].isoformat(), fila["id"], fila["saldo"], str(fila["valor"])],
+        salt="kardex",
+    )
+
+
+def leer_cursor(producto_id, texto):
+    try:
+        pid, fecha, mid, saldo, valor = signing.loads(texto, salt="kardex")
+        if pid != producto_id:
+            raise ValueError
+        return parse_datetime(fecha), int(mid), int(saldo), Decimal(valor)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise CursorInvalido("Cursor inválido.")
+
+
+def pagina(producto_id, cursor=None, desde=None, tamano=TAMANO):
+    """
+    Devuelve (saldo_anterior, valor_anterior, filas, siguiente) para la página
+    que empieza en `cursor` o, sin cursor, en `desde` (datetime) o en el
+    primer movimiento. `siguiente` es None en la última página.
+    """
+    tamano = max(1, min(tamano, MAX_TAMANO))
+    if cursor:
+        fecha, mid, saldo, valor = leer_cursor(producto_id, cursor)
+        qs = movimientos(producto_id, despues=(fecha, mid))
+    else:
+        saldo, valor = saldo_inicial(producto_id, desde) if desde else (0, Decimal("0.00"))
+        qs = movimientos(producto_id, desde=desde)
+
+    filas = [_fila(m, saldo, valor) for m in qs[:tamano + 1]]
+    siguiente = _cursor(producto_id, filas[tamano - 1]) if len(filas) > tamano else None
+    return saldo, valor, filas[:tamano], siguiente
+
+
+def filas_todas(producto_id, desde=None, chunk_size=2000):
+    """Todas las filas del kardex (para el CSV), leídas por partes con un cursor del servidor."""
+    saldo, valor = saldo_inicial(producto_id, desde) if desde else (0, Decimal("0.00"))
+    for m in movimientos(producto_id, desde=desde).iterator(chunk_size=chunk_size):
+        yield _fila(m, saldo, valor)
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import reposicion
+
+
+class Command(BaseCommand):
+    help = "Recalcula venta diaria, punto de reorden y cantidad sugerida de todos los productos activos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=reposicion.DIAS_HISTORIA, help="Días de historia de SALIDAS.")
+        parser.add_argument("--plazo", type=int, default=reposicion.PLAZO, help="Días que tarda en llegar un pedido.")
+        parser.add_argument("--ciclo", type=int, default=reposicion.CICLO, help="Días de venta que cubre cada pedido.")
+
+    def handle(self, *args, **options):
+        if options["dias"] < 1:
+            raise CommandError("--dias debe ser mayor que cero.")
+        inicio = time.perf_counter()
+        total = reposicion.calcular_reposicion(
+            dias=options["dias"], plazo=options["plazo"], ciclo=options["ciclo"],
+        )
+        self.stdout.write(f"{total} productos calculados en {time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.carga_masiva import cargar_csv
+from core.importacion import ArchivoInvalido
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga un CSV de entradas de inventario con COPY (mismo formato que la "
+        "importación web). Pensado para archivos grandes: todo se aplica en una transacción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del CSV.")
+        parser.add_argument("--motivo", default="CARGA CSV", help="Motivo de los movimientos de entrada.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["archivo"], "rb") as archivo:
+                resultado = cargar_csv(archivo, motivo=options["motivo"])
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {options['archivo']}.")
+        except (ArchivoInvalido, RuntimeError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(resultado.mensaje()))
+        if resultado.errores:
+            self.stdout.write(self.style.WARNING(resultado.mensaje_errores()))
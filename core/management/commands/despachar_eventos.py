@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import InterfaceError, OperationalError, close_old_connections, connection
+
+from core.despacho import LOTE, despachar_lote, purgar_enviados
+
+ESPERA_MAXIMA = 60  # tope de la espera entre reintentos si la base no responde
+
+
+class Command(BaseCommand):
+    help = "Entrega por webhook los eventos de la bandeja de salida (ventas y cruces de stock mínimo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default=settings.WEBHOOK_EVENTOS_URL, help="Por defecto WEBHOOK_EVENTOS_URL.")
+        parser.add_argument("--lote", type=int, default=LOTE, help="Eventos por POST.")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre revisiones cuando no hay nada.")
+        parser.add_argument("--conservar-dias", type=int, default=7, help="Días que se guardan los eventos ya enviados.")
+        parser.add_argument("--una-vez", action="store_true", help="Envía lo pendiente y termina.")
+
+    def handle(self, *args, **options):
+        url = options["url"]
+        if not url:
+            raise CommandError("Falta la URL del webhook (--url o WEBHOOK_EVENTOS_URL).")
+        secreto = settings.WEBHOOK_EVENTOS_SECRETO
+
+        ultima_purga = 0
+        fallos = 0
+        while True:
+            # Si la base se reinició, la conexión vieja se descarta aquí
+            close_old_connections()
+            try:
+                if time.monotonic() - ultima_purga > 3600:
+                    purgar_enviados(options["conservar_dias"])
+                    ultima_purga = time.monotonic()
+
+                enviados, fallidos = despachar_lote(url, secreto, max(1, options["lote"]))
+                fallos = 0
+            except (OperationalError, InterfaceError) as e:
+                connection.close()
+                fallos += 1
+                espera = min(options["intervalo"] * 2 ** fallos, ESPERA_MAXIMA)
+                self.stderr.write(f"Sin conexión a la base ({e}); reintento en {espera:.0f} s")
+                time.sleep(espera)
+                continue
+
+            if enviados:
+                self.stdout.write(f"{enviados} evento(s) enviados")
+            if fallidos:
+                # El lote fallido queda para más tarde; seguimos con los demás
+                self.stdout.write(self.style.WARNING(f"{fallidos} evento(s) fallaron; se reintentan más tarde"))
+            if enviados or fallidos:
+                continue
+            if options["una_vez"]:
+                break
+            time.sleep(options["intervalo"])
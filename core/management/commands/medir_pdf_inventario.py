@@ -0,0 +1,54 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Categoria, Producto
+from core.pdf_inventario import generar_pdf_inventario
+
+
+class _Deshacer(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tiempo y memoria pico de Python al generar el PDF de inventario. "
+        "Con --productos N crea N productos de prueba dentro de una transacción que se deshace al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                n = options["productos"]
+                if n:
+                    cat, _ = Categoria.objects.get_or_create(nombre="Benchmark PDF")
+                    Producto.objects.bulk_create(
+                        [
+                            Producto(nombre=f"Producto benchmark {i:06d}", sku=f"BENCH-PDF-{i}", categoria=cat, stock=i % 500)
+                            for i in range(n)
+                        ],
+                        batch_size=5000,
+                    )
+                total = Producto.objects.count()
+
+                tracemalloc.start()
+                inicio = time.perf_counter()
+                archivo = generar_pdf_inventario()
+                tamano = archivo.seek(0, 2)
+                segundos = time.perf_counter() - inicio
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                archivo.close()
+
+                self.stdout.write(
+                    f"{total} productos: {segundos:.1f} s, PDF {tamano / 1024 / 1024:.1f} MB, "
+                    f"memoria pico {pico / 1024 / 1024:.1f} MB"
+                )
+                raise _Deshacer
+        except _Deshacer:
+            pass
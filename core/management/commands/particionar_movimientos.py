@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Particiona MovimientoInventario por mes (--convertir, una sola vez) y crea las particiones "
+        "de los próximos meses. Sin --convertir no hace nada si la tabla no está particionada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convertir", action="store_true", help="Pasa la tabla al esquema particionado.")
+        parser.add_argument("--meses", type=int, default=particiones.MESES_ADELANTE, help="Meses por delante a crear.")
+
+    def handle(self, *args, **options):
+        if options["convertir"]:
+            try:
+                creadas = particiones.convertir(options["meses"])
+            except particiones.NoSePuedeParticionar as e:
+                raise CommandError(str(e))
+            if creadas is None:
+                self.stdout.write("La tabla ya estaba particionada.")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Tabla particionada: {creadas} meses."))
+            return
+
+        creadas = particiones.crear_meses(options["meses"])
+        self.stdout.write(f"Particiones nuevas: {creadas}")
@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import InterfaceError, OperationalError, close_old_connections, connection
+
+from core.trabajos import LATIDO_VENCIDO, ejecutar_en_hilo, latir, marcar_interrumpidos, tomar_pendiente
+
+ESPERA_MAXIMA = 60  # tope de la espera entre reintentos si la base no responde
+
+
+class Command(BaseCommand):
+    help = "Worker local que procesa las importaciones de CSV en segundo plano."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=2, help="Importaciones simultáneas (por defecto 2).")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre revisiones de la cola.")
+        parser.add_argument("--una-vez", action="store_true", help="Procesa lo pendiente y termina.")
+
+    def handle(self, *args, **options):
+        hilos = max(1, options["hilos"])
+        cada = LATIDO_VENCIDO.total_seconds() / 5
+        revisado = 0.0
+        fallos = 0
+
+        en_curso = {}
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            while True:
+                # Si la base se reinició, la conexión vieja se descarta aquí
+                close_old_connections()
+                en_curso = {f: pk for f, pk in en_curso.items() if not f.done()}
+                try:
+                    if time.monotonic() - revisado >= cada:
+                        # El latido se renueva aunque un lote tarde; los trabajos
+                        # de workers caídos (de esta u otra réplica) pasan a ERROR
+                        latir(list(en_curso.values()))
+                        interrumpidos = marcar_interrumpidos()
+                        if interrumpidos:
+                            self.stdout.write(self.style.WARNING(f"{interrumpidos} importación(es) interrumpida(s) marcadas con error."))
+                        revisado = time.monotonic()
+
+                    while len(en_curso) < hilos:
+                        trabajo = tomar_pendiente()
+                        if trabajo is None:
+                            break
+                        self.stdout.write(f"Importando {trabajo.nombre_archivo} (#{trabajo.pk})")
+                        en_curso[pool.submit(ejecutar_en_hilo, trabajo)] = trabajo.pk
+                    fallos = 0
+                except (OperationalError, InterfaceError) as e:
+                    connection.close()
+                    fallos += 1
+                    espera = min(options["intervalo"] * 2 ** fallos, ESPERA_MAXIMA)
+                    self.stderr.write(f"Sin conexión a la base ({e}); reintento en {espera:.0f} s")
+                    time.sleep(espera)
+                    continue
+
+                if options["una_vez"] and not en_curso:
+                    break
+                time.sleep(options["intervalo"])
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.reportes import reconstruir_ventas_diarias
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el acumulado diario de ventas (VentaDiaria) desde MovimientoInventario."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--desde",
+            help="Solo reconstruye desde esta fecha (YYYY-MM-DD). Por defecto todo el histórico.",
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options["desde"]:
+            try:
+                desde = datetime.strptime(options["desde"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("La fecha --desde debe tener formato YYYY-MM-DD.")
+
+        n_prod, n_cat = reconstruir_ventas_diarias(desde=desde)
+        self.stdout.write(self.style.SUCCESS(
+            f"Acumulado reconstruido: {n_prod} filas por producto, {n_cat} filas por categoría."
+        ))
@@ -0,0 +1,42 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total_venta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_costo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='core.producto')),
+            ],
+            options={
+                'ordering': ['-dia'],
+                'unique_together': {('dia', 'producto')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaCategoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total_venta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_costo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='core.categoria')),
+            ],
+            options={
+                'ordering': ['-dia'],
+                'unique_together': {('dia', 'categoria')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+INDICES = [
+    ("core_producto_nombre_trgm", "nombre gin_trgm_ops"),
+    ("core_producto_sku_trgm", "sku gin_trgm_ops"),
+    # icontains en Postgres se traduce a UPPER(col::text) LIKE UPPER(...)
+    ("core_producto_nombre_upper_trgm", "UPPER(nombre::text) gin_trgm_ops"),
+    ("core_producto_sku_upper_trgm", "UPPER(sku::text) gin_trgm_ops"),
+]
+
+
+def crear_indices(apps, schema_editor):
+    """
+    Crea pg_trgm y los índices GIN solo si el servidor tiene la extensión.
+    Si no la tiene, core/busqueda.py cae a búsqueda por subcadena.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for nombre, expresion in INDICES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {nombre} ON core_producto USING gin ({expresion})"
+        )
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for nombre, _ in INDICES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {nombre}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_venta_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
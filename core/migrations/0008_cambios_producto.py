@@ -0,0 +1,71 @@
+from django.db import migrations, models
+
+# Cada INSERT/UPDATE de un producto guarda el id de su transacción y cada
+# DELETE deja una lápida. Así cubre también los UPDATE masivos y el SQL
+# de la carga con COPY, que no pasan por save().
+TRIGGERS = """
+CREATE OR REPLACE FUNCTION core_producto_cambio() RETURNS trigger AS $$
+BEGIN
+    NEW.cambio := txid_current();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_producto_cambio
+    BEFORE INSERT OR UPDATE ON core_producto
+    FOR EACH ROW EXECUTE FUNCTION core_producto_cambio();
+
+CREATE OR REPLACE FUNCTION core_producto_eliminado() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO core_productoeliminado (producto_id, sku, cambio)
+    VALUES (OLD.id, OLD.sku, txid_current());
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_producto_eliminado
+    AFTER DELETE ON core_producto
+    FOR EACH ROW EXECUTE FUNCTION core_producto_eliminado();
+
+UPDATE core_producto SET cambio = txid_current();
+"""
+
+BORRAR_TRIGGERS = """
+DROP TRIGGER IF EXISTS core_producto_cambio ON core_producto;
+DROP TRIGGER IF EXISTS core_producto_eliminado ON core_producto;
+DROP FUNCTION IF EXISTS core_producto_cambio();
+DROP FUNCTION IF EXISTS core_producto_eliminado();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('producto_id', models.BigIntegerField()),
+                ('sku', models.CharField(max_length=50)),
+                ('cambio', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='cambio',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['cambio', 'id'], name='core_produc_cambio_4ed51e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoeliminado',
+            index=models.Index(fields=['cambio', 'producto_id'], name='core_produc_cambio_f53210_idx'),
+        ),
+        migrations.RunSQL(TRIGGERS, BORRAR_TRIGGERS),
+    ]
@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_evento_salida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaReposicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calculado', models.DateTimeField()),
+                ('venta_diaria', models.FloatField(default=0)),
+                ('desviacion', models.FloatField(default=0)),
+                ('stock', models.IntegerField(default=0)),
+                ('dias_cobertura', models.FloatField(blank=True, null=True)),
+                ('punto_reorden', models.IntegerField(default=0)),
+                ('cantidad_sugerida', models.IntegerField(default=0)),
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sugerencia', to='core.producto')),
+            ],
+            options={
+                'ordering': ['producto__nombre'],
+            },
+        ),
+    ]
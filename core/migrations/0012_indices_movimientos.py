@@ -0,0 +1,32 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Índices CONCURRENTLY: no bloquean las escrituras en una tabla grande
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_sugerencia_reposicion'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['producto', 'fecha', 'id'], include=('tipo', 'cantidad', 'costo_unitario'), name='core_mov_producto_fecha'),
+        ),
+        migrations.AlterField(
+            model_name='movimientoinventario',
+            name='producto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='core.producto'),
+        ),
+        AddIndexConcurrently(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['tipo', '-fecha'], name='core_mov_tipo_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='movimientoinventario',
+            index=models.Index(condition=models.Q(('motivo', 'VENTA'), ('tipo', 'SALIDA'), ('venta__isnull', True)), fields=['fecha'], name='core_mov_venta_sin_encabezado'),
+        ),
+    ]
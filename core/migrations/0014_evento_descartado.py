@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_trabajo_latido'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='eventosalida',
+            name='core_evento_pendiente',
+        ),
+        migrations.AddField(
+            model_name='eventosalida',
+            name='descartado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='eventosalida',
+            index=models.Index(condition=models.Q(('descartado__isnull', True), ('enviado__isnull', True)), fields=['proximo_intento', 'id'], name='core_evento_pendiente'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def cerrar_pendientes(apps, schema_editor):
+    """Los trabajos pendientes tenían el CSV en disco; hay que volver a subirlos."""
+    TrabajoImportacion = apps.get_model("core", "TrabajoImportacion")
+    TrabajoImportacion.objects.filter(estado="PENDIENTE").update(
+        estado="ERROR",
+        mensaje="El archivo se subió antes de la actualización; vuelve a subirlo.",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_evento_descartado'),
+    ]
+
+    operations = [
+        migrations.RunPython(cerrar_pendientes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='trabajoimportacion',
+            name='archivo',
+        ),
+        migrations.AddField(
+            model_name='trabajoimportacion',
+            name='contenido',
+            field=models.BinaryField(default=bytes),
+        ),
+    ]
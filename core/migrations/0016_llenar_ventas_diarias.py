@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def llenar_acumulado(apps, schema_editor):
+    """
+    El reporte solo lee el acumulado diario; las ventas anteriores a 0002 no
+    estaban en él. Si está vacío y hay ventas, se reconstruye una vez.
+    """
+    VentaDiariaCategoria = apps.get_model("core", "VentaDiariaCategoria")
+    VentaLinea = apps.get_model("core", "VentaLinea")
+    MovimientoInventario = apps.get_model("core", "MovimientoInventario")
+    if VentaDiariaCategoria.objects.exists():
+        return
+    hay_ventas = (
+        VentaLinea.objects.exists()
+        or MovimientoInventario.objects.filter(tipo="SALIDA", motivo="VENTA").exists()
+    )
+    if not hay_ventas:
+        return
+
+    # Es la misma cuenta que manage.py reconstruir_ventas_diarias
+    from core.reportes import reconstruir_ventas_diarias
+    reconstruir_ventas_diarias()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_trabajo_contenido'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_acumulado, migrations.RunPython.noop),
+    ]
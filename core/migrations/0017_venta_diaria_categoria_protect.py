@@ -0,0 +1,17 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_llenar_ventas_diarias'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ventadiariacategoria',
+            name='categoria',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ventas_diarias', to='core.categoria'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Índice CONCURRENTLY: no bloquea las escrituras en productos
+    atomic = False
+
+    dependencies = [
+        ('core', '0017_venta_diaria_categoria_protect'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='producto',
+            index=models.Index(fields=['categoria', 'nombre', 'id'], name='core_producto_cat_nombre'),
+        ),
+        migrations.AlterField(
+            model_name='producto',
+            name='categoria',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='productos', to='core.categoria'),
+        ),
+    ]
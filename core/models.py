@@ -1,4 +1,16 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class Contador(models.Model):
+    """Contadores de versión compartidos entre procesos (ej. 'catalogo')."""
+    nombre = models.CharField(max_length=40, unique=True)
+    valor = models.BigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nombre}={self.valor}"
 
 
 class Categoria(models.Model):
@@ -33,7 +45,8 @@ class Producto(models.Model):
 
     nombre = models.CharField(max_length=120)
     sku = models.CharField(max_length=50, unique=True)
-    categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT, related_name='productos')
+    # Sin índice propio: lo cubre core_producto_cat_nombre
+    categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT, related_name='productos', db_index=False)
     proveedor = models.ForeignKey(Proveedor, on_delete=models.SET_NULL, null=True, blank=True)
     precio_venta = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     costo_promedio = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -41,28 +54,265 @@ class Producto(models.Model):
     stock_minimo = models.IntegerField(default=0)
     unidad = models.CharField(max_length=5, choices=UNIDADES, default='und')
     activo = models.BooleanField(default=True)
+    # auto_now solo aplica en save(); los UPDATE masivos lo ponen a mano
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Id de la transacción que lo escribió por última vez; lo pone un trigger
+    # en cada INSERT/UPDATE (ver migración 0008 y core/sincronizacion.py)
+    cambio = models.BigIntegerField(default=0, editable=False)
+    # Columna calculada por Postgres: siempre al día, venga el cambio de donde venga
+    bajo_stock = models.GeneratedField(
+        expression=models.ExpressionWrapper(
+            models.Q(activo=True, stock__lte=models.F('stock_minimo')),
+            output_field=models.BooleanField(),
+        ),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ['nombre']
         unique_together = [('nombre', 'sku')]
+        indexes = [
+            models.Index(fields=['cambio', 'id']),
+            # Páginas de una categoría en ventas (views.ventas_categoria_productos)
+            models.Index(fields=['categoria', 'nombre', 'id'], name='core_producto_cat_nombre'),
+            models.Index(
+                fields=['nombre', 'cambio'],
+                condition=models.Q(bajo_stock=True),
+                name='core_producto_bajo_stock',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.sku})"
 
 
+class Venta(models.Model):
+    """Encabezado de una venta confirmada. No se modifica después de creada."""
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    cantidad = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    costo_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return f"Venta #{self.pk} ({self.fecha:%d/%m/%Y})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Las ventas confirmadas no se pueden modificar.")
+        super().save(*args, **kwargs)
+
+
+class VentaLinea(models.Model):
+    """
+    Línea de una venta con el precio y el costo del momento de la venta.
+    Guarda nombre/sku/categoría para que el histórico no dependa del producto actual.
+    """
+    venta = models.ForeignKey(Venta, on_delete=models.CASCADE, related_name='lineas')
+    producto = models.ForeignKey(Producto, on_delete=models.SET_NULL, null=True, related_name='ventas')
+    categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, related_name='+')
+    nombre = models.CharField(max_length=120)
+    sku = models.CharField(max_length=50)
+    cantidad = models.PositiveIntegerField()
+    precio_unitario = models.DecimalField(max_digits=12, decimal_places=2)
+    costo_unitario = models.DecimalField(max_digits=12, decimal_places=2)
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    costo_total = models.DecimalField(max_digits=14, decimal_places=2)
+    fecha = models.DateTimeField()
+
+    class Meta:
+        ordering = ['venta', 'id']
+        indexes = [models.Index(fields=['producto', 'fecha'])]
+
+    def __str__(self):
+        return f"{self.cantidad} x {self.nombre} ({self.sku})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Las ventas confirmadas no se pueden modificar.")
+        super().save(*args, **kwargs)
+
+
 class MovimientoInventario(models.Model):
     TIPO_CHOICES = [
         ('ENTRADA', 'Entrada'),
     ]
-    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='movimientos')
+    # Sin índice propio: lo cubre core_mov_producto_fecha
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='movimientos', db_index=False)
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
     cantidad = models.PositiveIntegerField()
     costo_unitario = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     motivo = models.CharField(max_length=120, blank=True, null=True)
     fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+    venta = models.ForeignKey(Venta, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimientos')
 
     class Meta:
         ordering = ['-fecha']
+        indexes = [
+            # Historial de un producto por fecha (kardex, reposición, filtro del admin)
+            models.Index(
+                fields=['producto', 'fecha', 'id'],
+                include=['tipo', 'cantidad', 'costo_unitario'],
+                name='core_mov_producto_fecha',
+            ),
+            # Filtro por tipo del admin, ya ordenado por fecha
+            models.Index(fields=['tipo', '-fecha'], name='core_mov_tipo_fecha'),
+            # Salidas de venta sin encabezado (reconstruir_ventas_diarias)
+            models.Index(
+                fields=['fecha'],
+                condition=models.Q(tipo='SALIDA', motivo='VENTA', venta__isnull=True),
+                name='core_mov_venta_sin_encabezado',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.cantidad} de {self.producto}"
+
+class VentaDiaria(models.Model):
+    """Acumulado de ventas por día y producto (lo mantiene la confirmación de venta)."""
+    dia = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ventas_diarias')
+    cantidad = models.IntegerField(default=0)
+    total_venta = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_costo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-dia']
+        unique_together = [('dia', 'producto')]
+
+    def __str__(self):
+        return f"{self.dia} {self.producto}: {self.cantidad}"
+
+
+class VentaDiariaCategoria(models.Model):
+    """Acumulado de ventas por día y categoría, para reportes de periodos largos."""
+    dia = models.DateField()
+    # PROTECT: borrar una categoría no puede borrar su historial de ventas
+    categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT, related_name='ventas_diarias')
+    cantidad = models.IntegerField(default=0)
+    total_venta = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_costo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-dia']
+        unique_together = [('dia', 'categoria')]
+
+    def __str__(self):
+        return f"{self.dia} {self.categoria}: {self.cantidad}"
+
+
+class ProductoEliminado(models.Model):
+    """Lápida de un producto borrado, para la sincronización por cambios. La llena un trigger."""
+    producto_id = models.BigIntegerField()
+    sku = models.CharField(max_length=50)
+    cambio = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['cambio', 'producto_id'])]
+
+    def __str__(self):
+        return f"{self.sku} (#{self.producto_id})"
+
+
+class EventoSalida(models.Model):
+    """
+    Bandeja de salida (outbox): se escribe en la misma transacción que la
+    venta o la entrada y la entrega después manage.py despachar_eventos.
+    """
+    VENTA_CONFIRMADA = 'venta_confirmada'
+    STOCK_BAJO = 'stock_bajo'
+    STOCK_REPUESTO = 'stock_repuesto'
+    TIPOS = [
+        (VENTA_CONFIRMADA, 'Venta confirmada'),
+        (STOCK_BAJO, 'Stock bajo el mínimo'),
+        (STOCK_REPUESTO, 'Stock repuesto sobre el mínimo'),
+    ]
+
+    tipo = models.CharField(max_length=30, choices=TIPOS)
+    datos = models.JSONField(default=dict)
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    # Agotó los reintentos (core/despacho.py MAX_INTENTOS); ya no se manda
+    descartado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['proximo_intento', 'id'],
+                condition=models.Q(enviado__isnull=True, descartado__isnull=True),
+                name='core_evento_pendiente',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk}"
+
+
+class TrabajoImportacion(models.Model):
+    """Importación de CSV que corre en segundo plano (manage.py procesar_importaciones)."""
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('TERMINADO', 'Terminado'),
+        ('ERROR', 'Error'),
+    ]
+    # El CSV subido va en la base: el worker puede correr en otro contenedor
+    # sin disco compartido. Se vacía al terminar.
+    contenido = models.BinaryField(default=bytes)
+    nombre_archivo = models.CharField(max_length=255)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default='PENDIENTE', db_index=True)
+    filas_procesadas = models.IntegerField(default=0)
+    filas_ok = models.IntegerField(default=0)
+    filas_rechazadas = models.IntegerField(default=0)
+    mensaje = models.TextField(blank=True)
+    errores = models.JSONField(default=list, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+    # Lo renueva el worker mientras procesa; si se vence, el worker murió
+    latido = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado']
+
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.get_estado_display()})"
+
+    @property
+    def en_curso(self):
+        return self.estado in ('PENDIENTE', 'PROCESANDO')
+
+    @property
+    def filas_por_segundo(self):
+        if not self.iniciado:
+            return 0
+        fin = self.terminado or timezone.now()
+        segundos = (fin - self.iniciado).total_seconds()
+        return round(self.filas_procesadas / segundos) if segundos > 0 else 0
+
+
+class SugerenciaReposicion(models.Model):
+    """Último cálculo de reposición de un producto (manage.py calcular_reposicion)."""
+    producto = models.OneToOneField(Producto, on_delete=models.CASCADE, related_name='sugerencia')
+    calculado = models.DateTimeField()
+    venta_diaria = models.FloatField(default=0)
+    desviacion = models.FloatField(default=0)
+    stock = models.IntegerField(default=0)
+    dias_cobertura = models.FloatField(null=True, blank=True)
+    punto_reorden = models.IntegerField(default=0)
+    cantidad_sugerida = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['producto__nombre']
 
     def __str__(self):
-        return f"{self.tipo} {self.cantidad} de {self.producto}"
\ No newline at end of file
+        return f"{self.producto}: pedir {self.cantidad_sugerida}"
@@ -0,0 +1,39 @@
+# core/paginacion.py
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class PaginacionBusqueda(LimitOffsetPagination):
+    """
+    Resultados de búsqueda ordenados por similitud (core/busqueda.py). El
+    cursor de DRF solo filtra por el primer campo del orden, y la similitud
+    es un float con muchos empates: se repetirían o saltarían filas. Las
+    búsquedas devuelven pocos resultados, así que limit/offset alcanza.
+    """
+    default_limit = 100
+    limit_query_param = "page_size"
+    max_limit = 1000
+
+
+class PaginacionCursor(CursorPagination):
+    """
+    Paginación por defecto de la API. El cursor apunta a un id, así que
+    insertar o borrar filas entre una página y otra no repite ni salta registros.
+    Las búsquedas por similitud se paginan con PaginacionBusqueda.
+    """
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    busqueda = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if "similitud" in queryset.query.annotations:
+            self.busqueda = PaginacionBusqueda()
+            return self.busqueda.paginate_queryset(queryset.order_by("-similitud", "id"), request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.busqueda:
+            return self.busqueda.get_paginated_response(data)
+        return super().get_paginated_response(data)
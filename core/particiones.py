@@ -0,0 +1,159 @@
+# core/particiones.py
+"""
+Particionado mensual opcional de MovimientoInventario (manage.py
+particionar_movimientos).
+
+convertir() reemplaza la tabla por una particionada por rango de `fecha`:
+una partición por mes (hora local) y una DEFAULT para fechas sin mes
+creado. PostgreSQL exige la columna de partición en la llave primaria, así
+que pasa a ser (id, fecha); para Django sigue siendo `id`, que sale de la
+misma secuencia. Los índices y llaves foráneas se recrean con sus nombres,
+así las migraciones que vengan los encuentran.
+
+crear_meses() agrega las particiones de los próximos meses y se corre una
+vez al mes (y al arrancar, ver entrypoint.sh). Si la DEFAULT ya tiene filas
+de un mes nuevo, se pasan a su partición.
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import MovimientoInventario
+
+TABLA = MovimientoInventario._meta.db_table
+DEFAULT = f"{TABLA}_default"
+MESES_ADELANTE = 3
+
+
+class NoSePuedeParticionar(Exception):
+    pass
+
+
+def _mes(fecha, mas=0):
+    """Primer instante (hora local) del mes de `fecha` más `mas` meses."""
+    tz = ZoneInfo(settings.TIME_ZONE)
+    fecha = fecha.astimezone(tz)
+    n = fecha.year * 12 + fecha.month - 1 + mas
+    return datetime(n // 12, n % 12 + 1, 1, tzinfo=tz)
+
+
+def esta_particionada(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLA])
+    fila = cursor.fetchone()
+    return fila is not None and fila[0] == "p"
+
+
+def _crear_mes(cursor, inicio):
+    """Crea la partición del mes que empieza en `inicio` si no existe."""
+    fin = _mes(inicio, 1)
+    nombre = f"{TABLA}_p{inicio:%Y_%m}"
+    cursor.execute("SELECT to_regclass(%s)", [nombre])
+    if cursor.fetchone()[0] is not None:
+        return False
+    # Se arma aparte y se adjunta: así se pueden pasar las filas que ya
+    # hubieran caído en DEFAULT para ese mes
+    cursor.execute(f"CREATE TABLE {nombre} (LIKE {TABLA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"""
+        WITH movidas AS (
+            DELETE FROM {DEFAULT} WHERE fecha >= %s AND fecha < %s RETURNING *
+        )
+        INSERT INTO {nombre} SELECT * FROM movidas
+        """,
+        [inicio, fin],
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLA} ATTACH PARTITION {nombre} FOR VALUES FROM (%s) TO (%s)",
+        [inicio, fin],
+    )
+    return True
+
+
+def _crear_meses(cursor, desde, meses_adelante):
+    inicio, ultimo = _mes(desde), _mes(timezone.now(), meses_adelante)
+    creadas = 0
+    while inicio <= ultimo:
+        creadas += _crear_mes(cursor, inicio)
+        inicio = _mes(inicio, 1)
+    return creadas
+
+
+def crear_meses(meses_adelante=MESES_ADELANTE):
+    """Crea las particiones que falten hasta `meses_adelante`; 0 si la tabla no está particionada."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not esta_particionada(cursor):
+            return 0
+        return _crear_meses(cursor, timezone.now(), meses_adelante)
+
+
+def convertir(meses_adelante=MESES_ADELANTE):
+    """
+    Pasa la tabla al esquema particionado en una transacción (bloquea los
+    movimientos mientras copia). Devuelve cuántas particiones mensuales creó;
+    None si ya estaba particionada.
+    """
+    anterior = f"{TABLA}_anterior"
+    with transaction.atomic(), connection.cursor() as cursor:
+        if esta_particionada(cursor):
+            return None
+        # Las FK de Django son diferidas; con chequeos pendientes no se puede alterar la tabla
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {TABLA} IN ACCESS EXCLUSIVE MODE")
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = %s::regclass",
+            [TABLA],
+        )
+        referencias = [r for r, in cursor.fetchall()]
+        if referencias:
+            raise NoSePuedeParticionar(f"Otras tablas apuntan a {TABLA}: {', '.join(referencias)}")
+
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisprimary
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass
+            """,
+            [TABLA],
+        )
+        indices = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLA],
+        )
+        foraneas = cursor.fetchall()
+        cursor.execute(f"SELECT min(fecha) FROM {TABLA}")
+        primera = cursor.fetchone()[0] or timezone.now()
+
+        # La tabla vieja se queda sin índices para liberar los nombres
+        cursor.execute(f"ALTER TABLE {TABLA} RENAME TO {anterior}")
+        for nombre, _, primaria in indices:
+            if primaria:
+                cursor.execute(f"ALTER TABLE {anterior} DROP CONSTRAINT {nombre}")
+            else:
+                cursor.execute(f"DROP INDEX {nombre}")
+
+        cursor.execute(
+            f"CREATE TABLE {TABLA} (LIKE {anterior} INCLUDING DEFAULTS INCLUDING IDENTITY "
+            f"INCLUDING CONSTRAINTS) PARTITION BY RANGE (fecha)"
+        )
+        cursor.execute(f"ALTER TABLE {TABLA} ADD PRIMARY KEY (id, fecha)")
+        cursor.execute(f"CREATE TABLE {DEFAULT} PARTITION OF {TABLA} DEFAULT")
+        creadas = _crear_meses(cursor, primera, meses_adelante)
+
+        cursor.execute(f"INSERT INTO {TABLA} SELECT * FROM {anterior}")
+        for _, definicion, primaria in indices:
+            if not primaria:
+                cursor.execute(definicion)
+        for nombre, definicion in foraneas:
+            cursor.execute(f"ALTER TABLE {TABLA} ADD CONSTRAINT {nombre} {definicion}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) FROM {TABLA}",
+            [TABLA],
+        )
+        cursor.execute(f"DROP TABLE {anterior}")
+        cursor.execute(f"ANALYZE {TABLA}")
+    return creadas
@@ -0,0 +1,152 @@
+# core/pdf_inventario.py
+"""
+PDF del inventario actual (inventario/pdf/).
+
+Los productos se leen por partes con .iterator() sobre values_list, sin
+instancias de modelo. La generación no es por streaming: el canvas de
+reportlab guarda todas las páginas (comprimidas) hasta el save(), así que
+la memoria del pico crece con el catálogo. Lo que sí va por partes es la
+respuesta HTTP, con FileResponse sobre el archivo ya guardado.
+
+La vista usa pdf_en_cache(): el PDF queda guardado en CACHE_DIR con el
+número de revisión del inventario (contador versiones.INVENTARIO) y,
+mientras no cambie el stock ni los productos, se entrega el mismo archivo.
+"""
+import os
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
+
+from django.conf import settings
+
+from . import versiones
+from .models import Producto
+
+TAMANO_PARTE = 2000                 # filas por ida a la base
+MAX_EN_MEMORIA = 1024 * 1024        # bytes del PDF antes de pasar a disco
+
+_UNIDADES = dict(Producto.UNIDADES)
+
+
+def filas_inventario(chunk_size=TAMANO_PARTE):
+    """Tuplas (nombre, sku, categoría, proveedor, stock, unidad) en orden de nombre."""
+    return (
+        Producto.objects
+        .order_by("nombre", "id")
+        .values_list(
+            "nombre", "sku", "categoria__nombre", "proveedor__nombre", "stock", "unidad",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def escribir_pdf(destino, filas):
+    """
+    Dibuja el inventario en `destino` (cualquier archivo binario). Las
+    páginas quedan en memoria hasta el final y se escriben todas en save().
+    """
+    # Importamos aquí para no romper todo el proyecto si falta la librería
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    # pageCompression: cada página terminada queda comprimida hasta el save()
+    p = canvas.Canvas(destino, pagesize=letter, pageCompression=1)
+    width, height = letter
+
+    y = height - 50
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(40, y, "Inventario actual - Placacenter")
+
+    y -= 25
+    p.setFont("Helvetica", 9)
+    p.drawString(40, y, "Nombre")
+    p.drawString(210, y, "SKU")
+    p.drawString(310, y, "Categoría")
+    p.drawString(430, y, "Proveedor")
+    p.drawString(540, y, "Stock")
+
+    y -= 18
+
+    for nombre, sku, categoria, proveedor, stock, unidad in filas:
+        if y < 40:
+            p.showPage()
+            y = height - 40
+            p.setFont("Helvetica", 9)
+
+        p.drawString(40, y, (nombre or "")[:30])
+        p.drawString(210, y, sku or "")
+        p.drawString(310, y, (categoria or "")[:18])
+        p.drawString(430, y, (proveedor or "")[:18])
+        p.drawRightString(590, y, f"{stock} {_UNIDADES.get(unidad, unidad)}")
+
+        y -= 16
+
+    p.showPage()
+    p.save()
+
+
+def generar_pdf_inventario(chunk_size=TAMANO_PARTE):
+    """Devuelve un archivo temporal con el PDF, ya rebobinado."""
+    archivo = SpooledTemporaryFile(max_size=MAX_EN_MEMORIA)
+    escribir_pdf(archivo, filas_inventario(chunk_size))
+    archivo.seek(0)
+    return archivo
+
+
+def etag_inventario(request=None):
+    return f"inventario-{versiones.leer(versiones.INVENTARIO)}"
+
+
+def _revision(ruta):
+    """Número de revisión de un archivo inventario-<n>.pdf; None si el nombre no calza."""
+    try:
+        return int(ruta.stem.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _carpeta():
+    carpeta = settings.CACHE_DIR / "pdf"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    return carpeta
+
+
+def pdf_en_cache():
+    """
+    Ruta del PDF para la revisión actual del inventario; lo genera si no existe.
+    La revisión se lee antes que los productos: si algo cambia mientras se
+    arma, el PDF queda con datos más nuevos que su revisión y el próximo
+    pedido lo vuelve a generar.
+    """
+    carpeta = _carpeta()
+    ruta = carpeta / f"{etag_inventario()}.pdf"
+    if ruta.exists():
+        return ruta
+
+    with NamedTemporaryFile(dir=carpeta, suffix=".tmp", delete=False) as tmp:
+        try:
+            escribir_pdf(tmp, filas_inventario())
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, ruta)
+
+    # Solo revisiones anteriores: un pedido lento de una revisión vieja no
+    # debe borrar el archivo que otro pedido acaba de generar
+    actual = _revision(ruta)
+    for viejo in carpeta.glob("inventario-*.pdf"):
+        revision = _revision(viejo)
+        if revision is not None and revision < actual:
+            viejo.unlink(missing_ok=True)
+    return ruta
+
+
+def abrir_pdf_en_cache(intentos=3):
+    """
+    Abre el PDF de la revisión actual. Si otro pedido lo borró entre que se
+    generó y se abrió (porque ya hay una revisión más nueva), lo vuelve a pedir.
+    """
+    for _ in range(intentos - 1):
+        try:
+            return open(pdf_en_cache(), "rb")
+        except FileNotFoundError:
+            continue
+    return open(pdf_en_cache(), "rb")
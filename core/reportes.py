@@ -0,0 +1,205 @@
+# core/reportes.py
+from datetime import datetime, time
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import TruncDate, TruncDay, TruncMonth, TruncWeek, TruncYear
+
+from .models import MovimientoInventario, VentaDiaria, VentaDiariaCategoria, VentaLinea
+
+TIPOS = ("diario", "semanal", "mensual", "anual")
+
+_TRUNC = {
+    "diario": TruncDay,
+    "semanal": TruncWeek,
+    "mensual": TruncMonth,
+    "anual": TruncYear,
+}
+
+_DINERO = DecimalField(max_digits=18, decimal_places=2)
+
+
+def inicio_del_dia(dia, tz=None):
+    """Medianoche local de `dia` como datetime con zona."""
+    return datetime.combine(dia, time.min, tzinfo=tz or ZoneInfo(settings.TIME_ZONE))
+
+
+def etiqueta_periodo(tipo, inicio):
+    """Texto que se muestra en la tabla para el periodo que empieza en `inicio`."""
+    if tipo == "diario":
+        return inicio.strftime("%d/%m/%Y")
+    if tipo == "semanal":
+        year, week, _ = inicio.isocalendar()
+        return f"Semana {week} - {year}"
+    if tipo == "mensual":
+        return inicio.strftime("%m/%Y")
+    return inicio.strftime("%Y")
+
+
+def ventas_por_periodo(tipo, desde=None, hasta=None):
+    """
+    Agrupa las ventas por periodo a partir del acumulado diario por categoría
+    (VentaDiariaCategoria), así un reporte anual de varios años lee unos
+    pocos miles de filas en vez de todo el histórico de movimientos.
+
+    Devuelve la lista de filas con las llaves que usa core/reporte_ventas.html:
+    periodo, cantidad, total_venta, total_costo, utilidad.
+    """
+    trunc = _TRUNC.get(tipo, TruncDay)
+
+    dias = VentaDiariaCategoria.objects.all()
+    if desde:
+        dias = dias.filter(dia__gte=desde)
+    if hasta:
+        dias = dias.filter(dia__lte=hasta)
+
+    periodos = (
+        dias
+        .annotate(inicio=trunc("dia"))
+        .values("inicio")
+        .annotate(
+            unidades=Sum("cantidad"),
+            venta=Sum("total_venta"),
+            costo=Sum("total_costo"),
+        )
+        .order_by("inicio")
+    )
+
+    filas = []
+    for g in periodos:
+        total_venta = g["venta"] or Decimal("0.00")
+        total_costo = g["costo"] or Decimal("0.00")
+        filas.append({
+            "periodo": etiqueta_periodo(tipo, g["inicio"]),
+            "cantidad": g["unidades"] or 0,
+            "total_venta": total_venta,
+            "total_costo": total_costo,
+            "utilidad": total_venta - total_costo,
+        })
+    return filas
+
+
+#  Acumulado diario
+
+_UPSERT = """
+    INSERT INTO {tabla} (dia, {llave}, cantidad, total_venta, total_costo)
+    VALUES {valores}
+    ON CONFLICT (dia, {llave}) DO UPDATE SET
+        cantidad = {tabla}.cantidad + EXCLUDED.cantidad,
+        total_venta = {tabla}.total_venta + EXCLUDED.total_venta,
+        total_costo = {tabla}.total_costo + EXCLUDED.total_costo
+"""
+
+
+def _sumar(acumulado, llave, cantidad, venta, costo):
+    cant, v, c = acumulado.get(llave, (0, Decimal("0.00"), Decimal("0.00")))
+    acumulado[llave] = (cant + cantidad, v + venta, c + costo)
+
+
+def _upsert(model, llave, acumulado):
+    """`acumulado` es {(dia, id): (cantidad, venta, costo)}; se suma a lo que ya haya."""
+    # Orden fijo para que dos cajas no se bloqueen cruzado en las mismas filas.
+    claves = sorted(k for k in acumulado if k[1] is not None)
+    if not claves:
+        return
+    params = []
+    for dia, key in claves:
+        cant, venta, costo = acumulado[(dia, key)]
+        params += [dia, key, cant, venta, costo]
+    sql = _UPSERT.format(
+        tabla=model._meta.db_table,
+        llave=llave,
+        valores=", ".join(["(%s, %s, %s, %s, %s)"] * len(claves)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _acumular(filas):
+    """`filas` son tuplas (dia, producto_id, categoria_id, cantidad, total_venta, total_costo)."""
+    por_producto = {}
+    por_categoria = {}
+    for dia, pid, cid, cantidad, venta, costo in filas:
+        _sumar(por_producto, (dia, pid), cantidad, venta, costo)
+        _sumar(por_categoria, (dia, cid), cantidad, venta, costo)
+    _upsert(VentaDiaria, "producto_id", por_producto)
+    _upsert(VentaDiariaCategoria, "categoria_id", por_categoria)
+
+
+def acumular_ventas(dia, lineas):
+    """
+    Suma unas líneas vendidas al acumulado del día (por producto y por categoría).
+    `lineas` son tuplas (producto_id, categoria_id, cantidad, total_venta, total_costo).
+    Se llama dentro de la transacción de la venta: dos consultas sin importar
+    cuántas líneas tenga.
+    """
+    _acumular((dia, *linea) for linea in lineas)
+
+
+def _por_lotes(filas, lote):
+    buffer = []
+    for fila in filas:
+        buffer.append(fila)
+        if len(buffer) >= lote:
+            yield buffer
+            buffer = []
+    if buffer:
+        yield buffer
+
+
+def reconstruir_ventas_diarias(desde=None, lote=2000):
+    """
+    Vuelve a calcular el acumulado diario. Si se da `desde`, solo reemplaza
+    los días desde esa fecha.
+
+    Las ventas con encabezado (VentaLinea) usan el total guardado al vender.
+    Los movimientos SALIDA/VENTA anteriores al registro de ventas no tienen
+    precio guardado; para esos se usa el precio_venta actual del producto.
+    """
+    tz = ZoneInfo(settings.TIME_ZONE)
+    lineas = VentaLinea.objects.all()
+    antiguos = MovimientoInventario.objects.filter(tipo="SALIDA", motivo="VENTA", venta__isnull=True)
+    if desde:
+        # Rango sobre la columna (no fecha__date) para que use los índices de fecha
+        inicio = inicio_del_dia(desde, tz)
+        lineas = lineas.filter(fecha__gte=inicio)
+        antiguos = antiguos.filter(fecha__gte=inicio)
+
+    desde_lineas = (
+        lineas
+        .annotate(dia=TruncDate("fecha", tzinfo=tz))
+        .values_list("dia", "producto_id", "categoria_id")
+        .annotate(
+            unidades=Sum("cantidad"),
+            importe=Sum("total"),
+            costo=Sum("costo_total"),
+        )
+        .order_by()
+    )
+    desde_movimientos = (
+        antiguos
+        .annotate(dia=TruncDate("fecha", tzinfo=tz))
+        .values_list("dia", "producto_id", "producto__categoria_id")
+        .annotate(
+            unidades=Sum("cantidad"),
+            importe=Sum(F("cantidad") * F("producto__precio_venta"), output_field=_DINERO),
+            costo=Sum(F("cantidad") * F("costo_unitario"), output_field=_DINERO),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        for model in (VentaDiaria, VentaDiariaCategoria):
+            viejas = model.objects.all()
+            if desde:
+                viejas = viejas.filter(dia__gte=desde)
+            viejas.delete()
+
+        for qs in (desde_movimientos, desde_lineas):
+            for filas in _por_lotes(qs.iterator(chunk_size=lote), lote):
+                _acumular(filas)
+
+    return VentaDiaria.objects.count(), VentaDiariaCategoria.objects.count()
@@ -0,0 +1,134 @@
+# core/reposicion.py
+"""
+Cálculo de reposición (manage.py calcular_reposicion).
+
+Por cada lote de productos activos la base devuelve las SALIDAS ya sumadas
+por producto y día (una consulta por lote); con eso se arma una matriz
+productos x días en NumPy y todas las cuentas se hacen sobre la matriz
+completa, sin recorrer producto por producto:
+
+  venta diaria     promedio de los últimos VENTANA días
+  desviación       de la venta diaria en toda la historia leída
+  punto de reorden venta diaria * plazo + Z * desviación * raíz(plazo)
+  cantidad         si stock <= punto de reorden, lo que falta para llegar
+                   al punto de reorden más CICLO días de venta
+
+El resultado reemplaza la tabla SugerenciaReposicion en una transacción
+(se escribe con COPY).
+"""
+import math
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import MovimientoInventario, Producto, SugerenciaReposicion
+
+DIAS_HISTORIA = 90
+VENTANA = 28        # días de la venta diaria "actual"
+PLAZO = 7           # días que tarda en llegar un pedido
+CICLO = 14          # días de venta que debe cubrir cada pedido
+Z = 1.65            # nivel de servicio de ~95 %
+LOTE = 5000         # productos por consulta
+
+
+def _salidas_por_dia(desde, hasta, primer_id, ultimo_id):
+    """Filas (producto_id, día desde `desde`, unidades) del rango de productos."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT producto_id,
+                   floor(extract(epoch FROM fecha - %s) / 86400)::int AS dia,
+                   SUM(cantidad)
+            FROM {MovimientoInventario._meta.db_table}
+            WHERE tipo = 'SALIDA'
+              AND producto_id BETWEEN %s AND %s
+              AND fecha >= %s AND fecha < %s
+            GROUP BY 1, 2
+            """,
+            [desde, primer_id, ultimo_id, desde, hasta],
+        )
+        return cursor.fetchall()
+
+
+def calcular_lote(ids, stock, filas, dias, plazo=PLAZO, ciclo=CICLO, z=Z):
+    """
+    Cuentas de un lote. `ids` (ordenados) y `stock` son arreglos por producto,
+    `filas` lo que devuelve _salidas_por_dia. Devuelve un dict de arreglos.
+    """
+    import numpy as np
+
+    demanda = np.zeros((len(ids), dias))
+    if filas:
+        pid, dia, unidades = np.array(filas, dtype=np.int64).T
+        fila = np.searchsorted(ids, pid).clip(max=len(ids) - 1)
+        es_del_lote = ids[fila] == pid  # el rango de ids incluye productos inactivos
+        demanda[fila[es_del_lote], dia[es_del_lote]] = unidades[es_del_lote]
+
+    venta_diaria = demanda[:, -min(VENTANA, dias):].mean(axis=1)
+    desviacion = demanda.std(axis=1)
+    punto = np.ceil(venta_diaria * plazo + z * desviacion * math.sqrt(plazo))
+    objetivo = punto + venta_diaria * ciclo
+    cantidad = np.where(stock <= punto, np.ceil(objetivo - stock), 0).clip(min=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cobertura = np.where(venta_diaria > 0, stock.clip(min=0) / venta_diaria, np.nan)
+
+    return {
+        "venta_diaria": venta_diaria.round(3),
+        "desviacion": desviacion.round(3),
+        "dias_cobertura": cobertura.round(1),
+        "punto_reorden": punto.astype(np.int64),
+        "cantidad_sugerida": cantidad.astype(np.int64),
+    }
+
+
+def _guardar(ids, stock, r, ahora):
+    """Escribe las sugerencias del lote con COPY."""
+    columnas = (
+        "venta_diaria", "desviacion", "dias_cobertura", "punto_reorden", "cantidad_sugerida",
+    )
+    filas = zip(ids.tolist(), stock.tolist(), *(r[c].tolist() for c in columnas))
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(
+            f"COPY {SugerenciaReposicion._meta.db_table} "
+            f"(producto_id, stock, {', '.join(columnas)}, calculado) FROM STDIN"
+        ) as copy:
+            for pid, s, v, d, c, p, q in filas:
+                copy.write_row((pid, s, v, d, None if math.isnan(c) else c, p, q, ahora))
+
+
+def calcular_reposicion(dias=DIAS_HISTORIA, plazo=PLAZO, ciclo=CICLO, z=Z, lote=LOTE):
+    """
+    Recalcula las sugerencias de todos los productos activos con las SALIDAS
+    de los últimos `dias` días completos (sin contar hoy). Devuelve cuántos
+    productos se calcularon.
+    """
+    import numpy as np
+
+    hasta = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    desde = hasta - timedelta(days=dias)
+    ahora = timezone.now()
+    total = 0
+    ultimo = 0
+
+    with transaction.atomic():
+        SugerenciaReposicion.objects.all().delete()
+        while True:
+            productos = list(
+                Producto.objects
+                .filter(activo=True, pk__gt=ultimo)
+                .order_by("pk")
+                .values_list("pk", "stock")[:lote]
+            )
+            if not productos:
+                break
+            ids, stock = np.array(productos, dtype=np.int64).T
+            ultimo = int(ids[-1])
+
+            r = calcular_lote(
+                ids, stock, _salidas_por_dia(desde, hasta, int(ids[0]), ultimo),
+                dias, plazo, ciclo, z,
+            )
+            _guardar(ids, stock, r, ahora)
+            total += len(productos)
+    return total
@@ -1,20 +1,41 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import Categoria, Proveedor, Producto
 
 
-class CategoriaSerializer(serializers.ModelSerializer):
+def campos_pedidos(request):
+    """Nombres de ?fields=id,sku,stock, o None si no se pidió."""
+    valor = request.query_params.get("fields") if request is not None else None
+    if not valor:
+        return None
+    return {c.strip() for c in valor.split(",") if c.strip()}
+
+
+class CamposParcialesMixin:
+    """Con ?fields=a,b el serializer solo devuelve esos campos (los desconocidos se ignoran)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        pedidos = campos_pedidos(self.context.get("request"))
+        if pedidos is not None:
+            for nombre in set(self.fields) - pedidos:
+                self.fields.pop(nombre)
+
+
+class CategoriaSerializer(CamposParcialesMixin, serializers.ModelSerializer):
     class Meta:
         model = Categoria
         fields = ['id', 'nombre']
 
 
-class ProveedorSerializer(serializers.ModelSerializer):
+class ProveedorSerializer(CamposParcialesMixin, serializers.ModelSerializer):
     class Meta:
         model = Proveedor
         fields = ['id', 'nombre', 'nit', 'telefono']
 
 
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposParcialesMixin, serializers.ModelSerializer):
     categoria_nombre = serializers.ReadOnlyField(source='categoria.nombre')
     proveedor_nombre = serializers.ReadOnlyField(source='proveedor.nombre')
 
@@ -23,5 +44,31 @@ class ProductoSerializer(serializers.ModelSerializer):
         model = Producto
         fields = [
             'id', 'nombre', 'sku', 'categoria', 'categoria_nombre', 'proveedor', 'proveedor_nombre',
-            'precio_venta', 'costo_promedio', 'stock', 'stock_minimo', 'unidad', 'activo'
-            ]
\ No newline at end of file
+            'precio_venta', 'costo_promedio', 'stock', 'stock_minimo', 'unidad', 'activo', 'updated_at'
+            ]
+        read_only_fields = ['updated_at']
+
+
+class LineaRecepcionSerializer(serializers.Serializer):
+    producto = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1)
+    costo_unitario = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0"))
+
+
+class RecepcionSerializer(serializers.Serializer):
+    motivo = serializers.CharField(max_length=120, required=False, allow_blank=True)
+    lineas = LineaRecepcionSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class MovimientoKardexSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    fecha = serializers.DateTimeField()
+    tipo = serializers.CharField()
+    motivo = serializers.CharField(allow_null=True)
+    venta = serializers.IntegerField(allow_null=True)
+    entrada = serializers.IntegerField()
+    salida = serializers.IntegerField()
+    costo_unitario = serializers.DecimalField(max_digits=12, decimal_places=2)
+    saldo = serializers.IntegerField()
+    valor = serializers.DecimalField(max_digits=18, decimal_places=2)
+    costo_promedio = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
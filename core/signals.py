@@ -0,0 +1,22 @@
+# core/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import versiones
+from .models import Categoria, Proveedor, Producto
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def producto_cambiado(sender, **kwargs):
+    versiones.incrementar(versiones.CATALOGO)
+    versiones.incrementar_al_confirmar(versiones.INVENTARIO)
+
+
+# El PDF de inventario muestra los nombres de categoría y proveedor
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=Proveedor)
+@receiver(post_delete, sender=Proveedor)
+def inventario_cambiado(sender, **kwargs):
+    versiones.incrementar_al_confirmar(versiones.INVENTARIO)
@@ -0,0 +1,101 @@
+# core/sincronizacion.py
+"""
+Sincronización por cambios (/api/productos/cambios/?desde=<cursor>).
+
+Un trigger guarda en Producto.cambio el id de la transacción que escribió
+cada fila, y los borrados quedan en ProductoEliminado. Se recorre por
+(cambio, id) con el índice de esas columnas, así el costo depende de
+cuántos productos cambiaron y no del tamaño del catálogo.
+
+Los ids de transacción no se confirman en orden: una transacción con id
+menor puede terminar después. Por eso, al empezar un recorrido se toma el
+xmin del snapshot (toda transacción con id menor ya terminó) y el
+siguiente recorrido arranca desde ahí. Puede que se repitan productos ya
+enviados, pero nunca se saltan; el cliente debe aplicar los cambios como
+"insertar o actualizar".
+
+Cursor: "c.i.k" o "c.i.k.b" = posición (cambio, id, 0 producto / 1 lápida)
+y, si el recorrido sigue, el xmin con que empezó.
+"""
+from django.db import connection
+from django.db.models import Q
+
+from .models import Producto, ProductoEliminado
+
+LIMITE = 500
+MAX_LIMITE = 2000
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _xmin():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cursor.fetchone()[0]
+
+
+def leer_cursor(texto):
+    if not texto:
+        return 0, 0, 0, None
+    try:
+        partes = [int(p) for p in texto.split(".")]
+    except ValueError:
+        raise CursorInvalido("Cursor inválido.")
+    if len(partes) == 3:
+        return (*partes, None)
+    if len(partes) == 4:
+        return tuple(partes)
+    raise CursorInvalido("Cursor inválido.")
+
+
+def _despues(campo_id, c, i, incluir_igual=False):
+    mismo = {"cambio": c, f"{campo_id}__gte" if incluir_igual else f"{campo_id}__gt": i}
+    return Q(cambio__gt=c) | Q(**mismo)
+
+
+def cambios_desde(cursor=None, limite=LIMITE, productos=None):
+    """
+    Devuelve (actualizados, eliminados, nuevo_cursor, hay_mas).
+      - actualizados: productos activos creados o modificados.
+      - eliminados: ids de productos borrados o desactivados.
+    Sin cursor se recorre todo el catálogo. `productos` permite pasar un
+    queryset con select_related/only.
+    """
+    c, i, k, base = leer_cursor(cursor)
+    if base is None:
+        base = _xmin()  # antes de leer: lo que confirme después tendrá id >= base
+    limite = max(1, min(limite, MAX_LIMITE))
+    productos = productos if productos is not None else Producto.objects.all()
+
+    filas = [
+        (p.cambio, p.pk, 0, p)
+        for p in productos.filter(_despues("id", c, i)).order_by("cambio", "id")[:limite + 1]
+    ]
+    # Con k == 0 la lápida con la misma posición (cambio, id) todavía no se envió
+    filas += [
+        (e.cambio, e.producto_id, 1, e)
+        for e in (
+            ProductoEliminado.objects
+            .filter(_despues("producto_id", c, i, incluir_igual=(k == 0)))
+            .order_by("cambio", "producto_id")[:limite + 1]
+        )
+    ]
+    filas.sort(key=lambda f: f[:3])
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    actualizados, eliminados = [], []
+    for _, pid, tipo, obj in filas:
+        if tipo == 0 and obj.activo:
+            actualizados.append(obj)
+        else:
+            eliminados.append(pid)
+
+    if hay_mas:
+        ultimo_c, ultimo_id, ultimo_k, _ = filas[-1]
+        nuevo = f"{ultimo_c}.{ultimo_id}.{ultimo_k}.{base}"
+    else:
+        nuevo = f"{base}.0.0"
+    return actualizados, eliminados, nuevo, hay_mas
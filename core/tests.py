@@ -1,2 +1,1012 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import FloatField, ProtectedError, Value
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from . import typeahead
+from .busqueda import buscar_productos
+from .carga_masiva import cargar_csv
+from .importacion import ArchivoInvalido, leer_fila, importar_filas, procesar_csv
+from .cart import SESSION_KEY
+from .checkout import confirmar_venta, StockInsuficiente
+from .despacho import despachar_lote
+from .paginacion import PaginacionCursor
+from .entradas import ProductosInexistentes, registrar_entrada, registrar_recepcion
+from .trabajos import encolar_importacion, ejecutar_importacion, latir, marcar_interrumpidos, tomar_pendiente
+from .typeahead import IndicePrefijos
+from .views import VENTAS_POR_PAGINA
+from .reportes import ventas_por_periodo, reconstruir_ventas_diarias, TIPOS
+from .reposicion import calcular_reposicion
+from . import despacho, kardex, particiones, pdf_inventario
+from .models import Categoria, Contador, EventoSalida, Producto, MovimientoInventario, SugerenciaReposicion, TrabajoImportacion, VentaDiaria, VentaDiariaCategoria
+
+User = get_user_model()
+
+
+class FakeCart:
+    def __init__(self, lineas):
+        self._cart = {str(pid): {"qty": qty, "precio": str(precio)} for pid, qty, precio in lineas}
+
+    def items(self):
+        return self._cart.items()
+
+
+def crear_productos(n, stock=10):
+    cat = Categoria.objects.create(nombre="Tornillería")
+    return [
+        Producto.objects.create(
+            nombre=f"Tornillo {i}", sku=f"T-{i}", categoria=cat,
+            precio_venta=Decimal("100.00"), costo_promedio=Decimal("60.00"), stock=stock,
+        )
+        for i in range(n)
+    ]
+
+
+class ConfirmarVentaTests(TestCase):
+    def _consultas(self, productos):
+        cart = FakeCart([(p.pk, 2, p.precio_venta) for p in productos])
+        with CaptureQueriesContext(connection) as ctx:
+            confirmar_venta(cart)
+        return len(ctx.captured_queries)
+
+    def test_consultas_constantes(self):
+        productos = crear_productos(40)
+        self.assertEqual(self._consultas(productos[:2]), self._consultas(productos))
+
+    def test_descuenta_y_registra_salidas(self):
+        a, b = crear_productos(2)
+        venta, resumen = confirmar_venta(FakeCart([(a.pk, 3, "100.00"), (b.pk, 1, "100.00")]))
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.stock, b.stock), (7, 9))
+        self.assertEqual(venta.total, Decimal("400.00"))
+        self.assertEqual(venta.costo_total, Decimal("240.00"))
+        self.assertEqual(venta.lineas.count(), 2)
+        self.assertEqual(len(resumen), 2)
+        self.assertEqual(
+            MovimientoInventario.objects.filter(tipo="SALIDA", motivo="VENTA").count(), 2
+        )
+
+    def test_stock_insuficiente_no_escribe_nada(self):
+        a, b = crear_productos(2, stock=1)
+        with self.assertRaises(StockInsuficiente):
+            confirmar_venta(FakeCart([(a.pk, 1, "100.00"), (b.pk, 5, "100.00")]))
+        a.refresh_from_db()
+        self.assertEqual(a.stock, 1)
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+
+class CartPartialTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("cajero", password="clave-segura")
+        self.client.force_login(user)
+
+    def _cargar_carrito(self, productos):
+        session = self.client.session
+        session[SESSION_KEY] = {str(p.pk): {"qty": 1, "precio": str(p.precio_venta)} for p in productos}
+        session.save()
+
+    def _consultas(self, productos):
+        self._cargar_carrito(productos)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("cart_partial"))
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_consultas_no_dependen_del_tamano_del_carrito(self):
+        productos = crear_productos(25)
+        self.assertEqual(self._consultas(productos[:1]), self._consultas(productos))
+
+    def test_producto_borrado_no_da_404(self):
+        a, b = crear_productos(2)
+        self._cargar_carrito([a, b])
+        b.delete()
+        resp = self.client.get(reverse("cart_partial"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, a.nombre)
+        self.assertNotIn(str(b.pk), self.client.session[SESSION_KEY])
+
+
+class ReporteVentasTests(TestCase):
+    def test_agrupa_por_periodo_en_la_base(self):
+        a, b = crear_productos(2)
+        confirmar_venta(FakeCart([(a.pk, 3, "100.00"), (b.pk, 2, "100.00")]))
+        hoy = timezone.localdate()
+        for tipo in TIPOS:
+            filas = ventas_por_periodo(tipo, hoy, hoy)
+            self.assertEqual(len(filas), 1)
+            self.assertEqual(filas[0]["cantidad"], 5)
+            self.assertEqual(filas[0]["total_venta"], Decimal("500.00"))
+            self.assertEqual(filas[0]["total_costo"], Decimal("300.00"))
+            self.assertEqual(filas[0]["utilidad"], Decimal("200.00"))
+
+    def test_reconstruir_da_lo_mismo_que_el_acumulado(self):
+        a, b = crear_productos(2)
+        confirmar_venta(FakeCart([(a.pk, 3, "100.00"), (b.pk, 2, "100.00")]))
+        confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        hoy = timezone.localdate()
+        antes = ventas_por_periodo("diario", hoy, hoy)
+        self.assertEqual(antes[0]["cantidad"], 6)
+        reconstruir_ventas_diarias()
+        self.assertEqual(ventas_por_periodo("diario", hoy, hoy), antes)
+        self.assertEqual(VentaDiaria.objects.count(), 2)
+        reconstruir_ventas_diarias(desde=hoy)
+        self.assertEqual(ventas_por_periodo("diario", hoy, hoy), antes)
+        reconstruir_ventas_diarias(desde=hoy + timedelta(days=1))
+        self.assertEqual(ventas_por_periodo("diario", hoy, hoy), antes)
+
+    def test_migracion_llena_el_acumulado_vacio(self):
+        from django.apps import apps
+        migracion = importlib.import_module("core.migrations.0016_llenar_ventas_diarias")
+        a, = crear_productos(1)
+        confirmar_venta(FakeCart([(a.pk, 2, "100.00")]))
+        hoy = timezone.localdate()
+        antes = ventas_por_periodo("diario", hoy, hoy)
+        VentaDiaria.objects.all().delete()
+        VentaDiariaCategoria.objects.all().delete()
+
+        migracion.llenar_acumulado(apps, None)
+        self.assertEqual(ventas_por_periodo("diario", hoy, hoy), antes)
+
+    def test_borrar_categoria_no_borra_su_historial(self):
+        a, = crear_productos(1)
+        confirmar_venta(FakeCart([(a.pk, 2, "100.00")]))
+        vieja = a.categoria
+        Producto.objects.filter(pk=a.pk).update(categoria=Categoria.objects.create(nombre="Nueva"))
+        with self.assertRaises(ProtectedError):
+            vieja.delete()
+        self.assertTrue(VentaDiariaCategoria.objects.filter(categoria=vieja).exists())
+
+    def test_reporte_usa_el_precio_de_la_venta(self):
+        a, = crear_productos(1)
+        confirmar_venta(FakeCart([(a.pk, 2, "100.00")]))
+        Producto.objects.filter(pk=a.pk).update(precio_venta=Decimal("999.00"))
+        reconstruir_ventas_diarias()
+        hoy = timezone.localdate()
+        self.assertEqual(ventas_por_periodo("diario", hoy, hoy)[0]["total_venta"], Decimal("200.00"))
+
+
+class BuscarProductosTests(TestCase):
+    def test_sku_exacto_y_subcadena(self):
+        crear_productos(12)
+        qs = Producto.objects.all()
+        self.assertEqual([p.sku for p in buscar_productos(qs, "T-1")], ["T-1"])
+        self.assertEqual(buscar_productos(qs, "t-1").count(), 1)
+        self.assertEqual(buscar_productos(qs, "tornillo 1").count(), 3)
+        self.assertEqual(buscar_productos(qs, "").count(), 12)
+
+
+class TypeaheadTests(TestCase):
+    def test_prefijos_sin_tildes_ni_mayusculas(self):
+        indice = IndicePrefijos([
+            (1, "Tornillo Drywall 1/4", "TD-14", Decimal("100")),
+            (2, "Tuerca hexagonal", "TU-01", Decimal("50")),
+            (3, "Pegante Tornillería", "PG-9", Decimal("80")),
+        ])
+        self.assertEqual([p["id"] for p in indice.buscar("TORN")], [3, 1])
+        self.assertEqual([p["id"] for p in indice.buscar("tornilleria")], [3])
+        self.assertEqual([p["id"] for p in indice.buscar("torn dry")], [1])
+        self.assertEqual([p["id"] for p in indice.buscar("tu-0")], [2])
+        self.assertEqual(indice.buscar("clavo"), [])
+
+    def test_sku_exacto_antes_que_sin_mayusculas(self):
+        indice = IndicePrefijos([
+            (1, "Tornillo", "ab-1", Decimal("100")),
+            (2, "Tuerca", "AB-1", Decimal("50")),
+            (3, "Pegante", "PG-9", Decimal("80")),
+        ])
+        self.assertEqual(indice.resolver("ab-1"), (1, Decimal("100")))
+        self.assertEqual(indice.resolver(" AB-1 "), (2, Decimal("50")))
+        self.assertIsNone(indice.resolver("Ab-1"))  # ambiguo: no se adivina
+        self.assertEqual(indice.resolver("pg-9"), (3, Decimal("80")))
+
+    def test_se_refresca_con_la_version_del_catalogo(self):
+        typeahead.INTERVALO_REVISION = 0
+        self.addCleanup(setattr, typeahead, "INTERVALO_REVISION", 1.0)
+        a, = crear_productos(1)
+        self.assertEqual(len(typeahead.sugerencias("tornillo")), 1)
+        Producto.objects.create(nombre="Tornillo nuevo", sku="TN-1", categoria=a.categoria)
+        self.assertEqual(len(typeahead.sugerencias("tornillo")), 2)
+
+
+class VentasCatalogoTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("cajero", password="clave-segura")
+        self.client.force_login(user)
+
+    def test_recorre_la_categoria_por_paginas(self):
+        productos = crear_productos(VENTAS_POR_PAGINA + 5)
+        cat = productos[0].categoria
+        url = reverse("ventas_categoria_productos", args=[cat.id])
+        vistos = []
+        while url:
+            resp = self.client.get(url)
+            vistos += [p.id for p in resp.context["productos"]]
+            siguiente = resp.context["siguiente"]
+            url = reverse("ventas_categoria_productos", args=[cat.id]) + siguiente if siguiente else None
+        self.assertEqual(sorted(vistos), sorted(p.id for p in productos))
+        self.assertEqual(len(vistos), len(set(vistos)))
+
+
+class CartScanTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("cajero", password="clave-segura")
+        self.client.force_login(user)
+        # La versión del catálogo vuelve atrás con cada test: sin esto queda el índice de otro
+        typeahead._indice = None
+        typeahead.INTERVALO_REVISION = 0
+        self.addCleanup(setattr, typeahead, "INTERVALO_REVISION", 1.0)
+
+    def test_escaneo_por_sku(self):
+        a, b = crear_productos(2)
+        self.client.get(reverse("cart_scan", args=["t-0"]))
+        self.client.post(reverse("cart_scan_lote"), {"skus": "T-0\nT-1\nT-1\nNO-EXISTE"})
+        cart = self.client.session[SESSION_KEY]
+        self.assertEqual(cart[str(a.pk)]["qty"], 2)
+        self.assertEqual(cart[str(b.pk)]["qty"], 2)
+
+    def test_sku_desconocido(self):
+        crear_productos(1)
+        resp = self.client.get(reverse("cart_scan", args=["NO-EXISTE"]))
+        self.assertContains(resp, "Código no encontrado")
+
+
+class ImportacionTests(TestCase):
+    def _csv(self, filas):
+        texto = "producto,categoria,proveedor,cantidad,costo_unitario,sku,precio_venta\n" + "\n".join(filas)
+        return [(n, leer_fila(f)) for n, f in enumerate(csv.DictReader(io.StringIO(texto)), start=2)]
+
+    def test_costo_promedio_con_producto_repetido(self):
+        a, = crear_productos(1)  # stock 10 a 60.00
+        resultado = importar_filas(self._csv([
+            "Tornillo 0,Tornillería,Acme,10,80,T-0,",
+            "Tornillo 0,Tornillería,Acme,20,50,T-0,150",
+            "Broca 3mm,Brocas,Acme,5,1000,,2000",
+            "Broca 3mm,Brocas,,5,2000,,",
+        ]))
+        self.assertEqual(resultado.filas_ok, 4)
+        self.assertEqual((resultado.creadas_cat, resultado.creados_prov, resultado.creados_prod), (1, 1, 1))
+        a.refresh_from_db()
+        # (10*60 + 10*80) / 20 = 70 ; (20*70 + 20*50) / 40 = 60
+        self.assertEqual((a.stock, a.costo_promedio, a.precio_venta), (40, Decimal("60.00"), Decimal("150.00")))
+        broca = Producto.objects.get(nombre="Broca 3mm")
+        self.assertEqual((broca.stock, broca.costo_promedio), (10, Decimal("1500.00")))
+        self.assertTrue(broca.sku.startswith("CSV-"))
+        self.assertEqual(MovimientoInventario.objects.filter(motivo="CARGA CSV").count(), 4)
+
+    def test_consultas_no_dependen_de_las_filas(self):
+        crear_productos(1)
+
+        def consultas(n):
+            registros = self._csv([f"Prod {n}-{i},Cat {n}-{i % 3},Prov {n}-{i % 2},1,10,S-{n}-{i}," for i in range(n)])
+            with CaptureQueriesContext(connection) as ctx:
+                importar_filas(registros)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(consultas(5), consultas(60))
+
+    def test_valores_que_no_caben_se_rechazan_por_fila(self):
+        texto = "producto,categoria,proveedor,cantidad,costo_unitario,sku,precio_venta\n" + "\n".join([
+            "Tubo,PVC,Pavco,1,100,,",
+            "X" * 121 + ",PVC,Pavco,1,100,,",
+            "Codo,PVC,Pavco,1,100," + "S" * 51 + ",",
+            "Codo,PVC,Pavco,3000000000,100,,",
+            "Codo,PVC,Pavco,1,10000000000,,",
+            "Codo,PVC,Pavco,1,100,,1e10",
+            "Codo,PVC,Pavco,1,NaN,,",
+            "Tapón,PVC,Pavco,1,100,,",
+        ])
+        resultado = procesar_csv(SimpleUploadedFile("e.csv", texto.encode()), tamano_lote=2)
+        self.assertEqual((resultado.filas_ok, resultado.filas_rechazadas), (2, 6))
+        self.assertEqual([num for num, _ in resultado.errores], [3, 4, 5, 6, 7, 8])
+        self.assertIn("máximo 120", resultado.errores[0][1])
+        self.assertEqual(set(Producto.objects.values_list("nombre", flat=True)), {"Tubo", "Tapón"})
+
+    def test_procesar_por_lotes_con_errores_por_fila(self):
+        texto = (
+            "Producto;Categoria;Proveedor;Cantidad;Costo_unitario\n"
+            "Tubería PVC;Plomería;Pavco;3;1000\n"
+            ";Plomería;Pavco;3;1000\n"
+            "Codo PVC;Plomería;Pavco;dos;500\n"
+            "Codo PVC;Plomería;Pavco;2;500\n"
+            "Tubería PVC;Plomería;Pavco;1;2000\n"
+        )
+        archivo = SimpleUploadedFile("entradas.csv", texto.encode("latin1"))
+        resultado = procesar_csv(archivo, tamano_lote=2)
+        self.assertEqual((resultado.filas_ok, resultado.filas_rechazadas), (3, 2))
+        self.assertEqual([num for num, _ in resultado.errores], [3, 4])
+        tubo = Producto.objects.get(nombre="Tubería PVC")
+        self.assertEqual((tubo.stock, tubo.costo_promedio), (4, Decimal("1250.00")))
+
+    def test_latin1_despues_del_primer_bloque(self):
+        # 0x85 es "…" en latin1 y no debe partir la fila; "í" aparece después del bloque de detección
+        texto = "producto,categoria,proveedor,cantidad,costo_unitario\n" + "Tubo,Cat,Prov,1,1\n" * 8000
+        texto += "Tubo\x85 PVC,Cat,Prov,3,1\nTubería,Cat,Prov,2,1\n"
+        resultado = procesar_csv(SimpleUploadedFile("e.csv", texto.encode("latin1")))
+        self.assertEqual((resultado.filas_ok, resultado.filas_rechazadas), (8002, 0))
+        self.assertEqual(
+            sorted(Producto.objects.values_list("nombre", flat=True)),
+            ["Tubería", "Tubo", "Tubo\x85 PVC"],
+        )
+
+    def test_archivo_sin_columnas(self):
+        archivo = SimpleUploadedFile("x.csv", b"nombre,cantidad\na,1\n")
+        with self.assertRaises(ArchivoInvalido):
+            procesar_csv(archivo)
+
+
+class TrabajoImportacionTests(TestCase):
+    def test_encolar_y_procesar(self):
+        texto = "producto,categoria,proveedor,cantidad,costo_unitario\nTubo,PVC,Pavco,3,1000\nMalo,PVC,,x,1\n"
+        trabajo = encolar_importacion(SimpleUploadedFile("e.csv", texto.encode()))
+        self.assertEqual(trabajo.estado, "PENDIENTE")
+        self.assertFalse(Producto.objects.exists())
+
+        tomado = tomar_pendiente()
+        self.assertEqual(tomado.pk, trabajo.pk)
+        self.assertIsNone(tomar_pendiente())
+        ejecutar_importacion(tomado)
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "TERMINADO")
+        self.assertEqual(bytes(trabajo.contenido), b"")
+        self.assertEqual((trabajo.filas_procesadas, trabajo.filas_ok, trabajo.filas_rechazadas), (2, 1, 1))
+        self.assertEqual(trabajo.errores[0][0], 3)
+        self.assertEqual(Producto.objects.get(nombre="Tubo").stock, 3)
+
+
+    def test_solo_se_interrumpen_los_que_no_laten(self):
+        vivo = encolar_importacion(SimpleUploadedFile("a.csv", b"x"))
+        caido = encolar_importacion(SimpleUploadedFile("b.csv", b"x"))
+        tomar_pendiente(), tomar_pendiente()
+        hace_rato = timezone.now() - timedelta(minutes=10)
+        TrabajoImportacion.objects.filter(pk__in=[vivo.pk, caido.pk]).update(latido=hace_rato)
+        latir([vivo.pk])  # otra réplica sigue procesando este
+
+        self.assertEqual(marcar_interrumpidos(), 1)
+        self.assertEqual(
+            dict(TrabajoImportacion.objects.values_list("pk", "estado")),
+            {vivo.pk: "PROCESANDO", caido.pk: "ERROR"},
+        )
+
+
+    def test_worker_sobrevive_a_la_caida_de_la_base(self):
+        from .management.commands import procesar_importaciones as comando
+        respuestas = iter([OperationalError("server closed the connection"), None])
+
+        def tomar():
+            r = next(respuestas)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        salida = io.StringIO()
+        with mock.patch.object(comando, "tomar_pendiente", tomar), \
+                mock.patch.object(comando, "connection") as conexion, \
+                mock.patch.object(comando, "close_old_connections") as cerrar_viejas, \
+                mock.patch.object(comando.time, "sleep") as dormir:
+            call_command("procesar_importaciones", "--una-vez", stdout=salida, stderr=salida)
+        conexion.close.assert_called_once()
+        self.assertEqual(cerrar_viejas.call_count, 2)
+        self.assertEqual(dormir.call_args_list[0], mock.call(4.0))
+        self.assertIn("Sin conexión a la base", salida.getvalue())
+
+
+class CargaMasivaTests(TestCase):
+    def _cargar(self, texto):
+        return cargar_csv(io.BytesIO(texto.encode("utf-8")))
+
+    def _productos(self):
+        return {
+            nombre: datos
+            for nombre, *datos in Producto.objects.values_list("nombre", "stock", "costo_promedio", "precio_venta")
+        }
+
+    def test_mismo_resultado_que_la_importacion_web(self):
+        a, = crear_productos(1)  # stock 10 a 60.00
+        texto = (
+            "producto,categoria,proveedor,cantidad,costo_unitario,sku,precio_venta\n"
+            "Tornillo 0,Tornillería,Acme,10,80,T-0,\n"
+            "Tornillo 0,Tornillería,Acme,30,60,T-0,150\n"
+            "Broca 3mm,Brocas,Acme,5,1000,,2000\n"
+            "Broca 3mm,Brocas,,5,2000,,\n"
+            ",Brocas,,5,2000,,\n"
+            "Lija,,,1,abc,,\n"
+            "Lija,,,1,10,,\n"
+            # Empates: 0.005 por fila sube a 0.01; con todo junto daría 0.01 / 3 = 0.00
+            "Arandela,Brocas,,1,0.01,,\n"
+            "Arandela,Brocas,,1,0,,\n"
+            "Arandela,Brocas,,1,0,,\n"
+            "Clavo,Brocas,,2,0.005,,0.125\n"
+        )
+        with transaction.atomic():
+            procesar_csv(io.BytesIO(texto.encode("utf-8")))
+            web = self._productos()
+            transaction.set_rollback(True)
+
+        resultado = self._cargar(texto)
+        self.assertEqual(self._productos(), web)
+        self.assertEqual(web["Arandela"], [3, Decimal("0.01"), Decimal("0.00")])
+        self.assertEqual(web["Clavo"], [2, Decimal("0.01"), Decimal("0.13")])
+        self.assertEqual((resultado.filas_ok, resultado.filas_rechazadas), (8, 3))
+        self.assertEqual([num for num, _ in resultado.errores], [6, 7, 8])
+        self.assertEqual((resultado.creadas_cat, resultado.creados_prov, resultado.creados_prod), (1, 1, 3))
+        a.refresh_from_db()
+        # (10*60 + 10*80 + 30*60) / 50 = 64
+        self.assertEqual((a.stock, a.costo_promedio, a.precio_venta), (50, Decimal("64.00"), Decimal("150.00")))
+        broca = Producto.objects.get(nombre="Broca 3mm")
+        self.assertEqual((broca.stock, broca.costo_promedio, broca.precio_venta), (10, Decimal("1500.00"), Decimal("2000.00")))
+        self.assertTrue(broca.sku.startswith("CSV-"))
+        self.assertEqual(MovimientoInventario.objects.filter(motivo="CARGA CSV").count(), 8)
+
+    def test_consultas_no_dependen_de_las_filas(self):
+        def consultas(n):
+            texto = "producto;categoria;proveedor;cantidad;costo_unitario\n" + "".join(
+                f"Prod {n}-{i};Cat {i % 3};Prov {i % 2};1;10\n" for i in range(n)
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                self._cargar(texto)
+            return len(ctx.captured_queries)
+
+        consultas(1)  # crea los contadores
+        self.assertEqual(consultas(5), consultas(200))
+
+
+class InventarioPdfTests(TestCase):
+    def setUp(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, ignore_errors=True)
+        ajuste = self.settings(CACHE_DIR=Path(cache))
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.client.force_login(User.objects.create_user("gerente", password="clave-segura"))
+
+    def _pdf(self, **headers):
+        resp = self.client.get(reverse("inventario_entradas_pdf"), headers=headers)
+        if resp.streaming:
+            resp.content_pdf = b"".join(resp.streaming_content)
+        return resp
+
+    def test_pdf_por_partes(self):
+        crear_productos(5)
+        resp = self._pdf()
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("inventario_placacenter.pdf", resp["Content-Disposition"])
+        self.assertTrue(resp.content_pdf.startswith(b"%PDF"))
+
+    def test_cache_por_revision_y_304(self):
+        a, = crear_productos(1)
+        primero = self._pdf()
+        etag = primero["ETag"]
+        self.assertEqual(self._pdf(If_None_Match=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        segundo = self._pdf(If_None_Match=etag)
+        self.assertEqual(segundo.status_code, 200)
+        self.assertNotEqual(segundo["ETag"], etag)
+
+    def test_solo_borra_revisiones_anteriores(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_productos(2)
+        ruta = pdf_inventario.pdf_en_cache()
+        revision = pdf_inventario._revision(ruta)
+        vieja = ruta.with_name(f"inventario-{revision - 1}.pdf")
+        nueva = ruta.with_name(f"inventario-{revision + 1}.pdf")
+        vieja.write_bytes(b"x")
+        nueva.write_bytes(b"x")
+        ruta.unlink()
+        pdf_inventario.pdf_en_cache()
+        self.assertEqual((vieja.exists(), nueva.exists(), ruta.exists()), (False, True, True))
+
+        # Si el archivo desaparece antes de abrirlo, se vuelve a generar
+        real = pdf_inventario.pdf_en_cache
+        with mock.patch.object(pdf_inventario, "pdf_en_cache", side_effect=[vieja, real()]):
+            with pdf_inventario.abrir_pdf_en_cache() as archivo:
+                self.assertEqual(archivo.read(4), b"%PDF")
+
+
+class RecepcionTests(TestCase):
+    def test_consultas_no_dependen_de_las_lineas(self):
+        productos = crear_productos(60)
+
+        def consultas(n):
+            with CaptureQueriesContext(connection) as ctx:
+                registrar_recepcion([(p.pk, 2, Decimal("80.00")) for p in productos[:n]])
+            return len(ctx.captured_queries)
+
+        self.assertEqual(consultas(5), consultas(60))
+
+    def test_costo_promedio_y_producto_repetido(self):
+        a, b = crear_productos(2)  # stock 10 a 60.00
+        registrar_recepcion([(a.pk, 10, Decimal("80")), (b.pk, 5, Decimal("60")), (a.pk, 20, Decimal("50"))])
+        a.refresh_from_db()
+        # (10*60 + 10*80 + 20*50) / 40 = 60
+        self.assertEqual((a.stock, a.costo_promedio), (40, Decimal("60.00")))
+        self.assertEqual(MovimientoInventario.objects.filter(tipo="ENTRADA").count(), 3)
+
+    def test_mismo_redondeo_que_la_importacion(self):
+        formulario, csv_web = crear_productos(2)
+        Producto.objects.update(stock=1, costo_promedio=Decimal("0.00"))
+        # (1*0.00 + 1*0.01) / 2 = 0.005: mitad lejos de cero en los dos caminos
+        registrar_recepcion([(formulario.pk, 1, Decimal("0.01"))])
+        importar_filas([(2, leer_fila({"producto": "Tornillo 1", "sku": "T-1", "cantidad": "1", "costo_unitario": "0.01"}))])
+        self.assertEqual(
+            list(Producto.objects.order_by("pk").values_list("costo_promedio", flat=True)),
+            [Decimal("0.01"), Decimal("0.01")],
+        )
+
+        # Si el stock nuevo queda en cero, el costo pasa a 0
+        Producto.objects.update(stock=-1, costo_promedio=Decimal("60.00"))
+        registrar_recepcion([(formulario.pk, 1, Decimal("80"))])
+        importar_filas([(2, leer_fila({"producto": "Tornillo 1", "sku": "T-1", "cantidad": "1", "costo_unitario": "80"}))])
+        self.assertEqual(
+            list(Producto.objects.order_by("pk").values_list("stock", "costo_promedio")),
+            [(0, Decimal("0.00")), (0, Decimal("0.00"))],
+        )
+
+    def test_producto_inexistente_no_escribe_nada(self):
+        a, = crear_productos(1)
+        with self.assertRaises(ProductosInexistentes):
+            registrar_recepcion([(a.pk, 1, Decimal("1")), (a.pk + 999, 1, Decimal("1"))])
+        a.refresh_from_db()
+        self.assertEqual(a.stock, 10)
+
+    def test_pantalla_y_api(self):
+        self.client.force_login(User.objects.create_user("bodega", password="clave-segura"))
+        a, b = crear_productos(2)
+        resp = self.client.post(reverse("inventario_recepcion"), {
+            "lineas-TOTAL_FORMS": "3", "lineas-INITIAL_FORMS": "0",
+            "lineas-0-sku": "t-0", "lineas-0-cantidad": "5", "lineas-0-costo_unitario": "60",
+            "lineas-1-sku": "T-1", "lineas-1-cantidad": "1", "lineas-1-costo_unitario": "60",
+            "motivo": "Factura 1",
+        })
+        self.assertRedirects(resp, reverse("inventario_entradas"), fetch_redirect_response=False)
+
+        resp = self.client.post(reverse("recepciones"), {
+            "lineas": [{"producto": a.pk, "cantidad": 5, "costo_unitario": "60.00"}],
+        }, content_type="application/json")
+        self.assertEqual(resp.status_code, 201)
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.stock, b.stock), (20, 11))
+
+        resp = self.client.post(reverse("recepciones"), {
+            "lineas": [{"producto": a.pk + 999, "cantidad": 5, "costo_unitario": "60.00"}],
+        }, content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+
+
+class EntradaStockConcurrenteTests(TransactionTestCase):
+    def test_entradas_en_paralelo_no_se_pierden(self):
+        a, = crear_productos(1)  # stock 10 a 60.00
+        hilos = 8
+        barrera = threading.Barrier(hilos)
+        errores = []
+
+        def entrar():
+            try:
+                barrera.wait()
+                registrar_entrada(a.pk, 10, Decimal("80.00"), "PRUEBA")
+            except Exception as e:  # pragma: no cover - se reporta abajo
+                errores.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=entrar) for _ in range(hilos)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errores, [])
+        a.refresh_from_db()
+        self.assertEqual(a.stock, 90)
+        # (10*60 + 80*80) / 90 = 77.78; con redondeo en cada paso puede variar un centavo
+        self.assertAlmostEqual(a.costo_promedio, Decimal("77.78"), delta=Decimal("0.02"))
+        self.assertEqual(MovimientoInventario.objects.filter(motivo="PRUEBA").count(), hilos)
+
+
+class ApiPaginacionTests(TestCase):
+    def test_cursor_estable_con_inserciones(self):
+        productos = crear_productos(5)
+        resp = self.client.get("/api/productos/", {"page_size": 2})
+        ids = [p["id"] for p in resp.json()["results"]]
+        siguiente = resp.json()["next"]
+        Producto.objects.create(nombre="Aaa nuevo", sku="NUEVO", categoria=productos[0].categoria)
+        while siguiente:
+            datos = self.client.get(siguiente).json()
+            ids += [p["id"] for p in datos["results"]]
+            siguiente = datos["next"]
+        self.assertEqual(ids[:5], [p.pk for p in productos])
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_busqueda_con_empates_por_limit_offset(self):
+        productos = crear_productos(7)
+        # Todos empatan en similitud (como lo anotaría core/busqueda.py con pg_trgm)
+        qs = Producto.objects.annotate(similitud=Value(0.5, output_field=FloatField()))
+        ids, url = [], "/api/productos/?search=tornilo&page_size=3"
+        while url:
+            paginador = PaginacionCursor()
+            pagina = paginador.paginate_queryset(qs, Request(APIRequestFactory().get(url)))
+            ids += [p.pk for p in pagina]
+            respuesta = paginador.get_paginated_response([])
+            self.assertEqual(respuesta.data["count"], 7)
+            url = respuesta.data["next"]
+        self.assertEqual(ids, [p.pk for p in productos])
+
+    def test_campos_parciales(self):
+        crear_productos(3)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/productos/", {"fields": "id,sku,stock,otro"})
+        self.assertEqual(set(resp.json()["results"][0]), {"id", "sku", "stock"})
+        self.assertNotIn("JOIN", ctx.captured_queries[-1]["sql"])
+        self.assertNotIn("precio_venta", ctx.captured_queries[-1]["sql"])
+
+        resp = self.client.get("/api/productos/", {"fields": "sku,categoria_nombre"})
+        self.assertEqual(resp.json()["results"][0], {"sku": "T-0", "categoria_nombre": "Tornillería"})
+
+    def test_stock_bajo_sin_paginar(self):
+        crear_productos(2, stock=0)
+        self.assertEqual(len(self.client.get("/api/alertas/stock-bajo/").json()), 2)
+
+
+class ApiCondicionalTests(TestCase):
+    def _hace(self, segundos):
+        Contador.objects.update(actualizado=timezone.now() - timedelta(seconds=segundos))
+
+    def test_304_con_una_consulta_y_cambia_con_el_stock(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            a, = crear_productos(1)
+        self._hace(5)
+        resp = self.client.get("/api/productos/")
+        etag, modificado = resp["ETag"], resp["Last-Modified"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/productos/", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        resp = self.client.get("/api/categorias/", headers={"If-Modified-Since": modificado})
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get(f"/api/productos/{a.pk + 1000}/", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 404)
+
+        antes = Producto.objects.get(pk=a.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        self.assertGreater(Producto.objects.get(pk=a.pk).updated_at, antes)
+        resp = self.client.get("/api/productos/", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_last_modified_solo_con_cambios_de_hace_mas_de_un_segundo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_productos(1)
+        self._hace(5)
+        modificado = self.client.get("/api/categorias/")["Last-Modified"]
+
+        # Otro cambio en el mismo segundo que la fecha que tiene el cliente
+        with self.captureOnCommitCallbacks(execute=True):
+            Categoria.objects.create(nombre="Pinturas")
+        self._hace(0)
+        resp = self.client.get("/api/categorias/", headers={"If-Modified-Since": modificado})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("Last-Modified", resp)
+
+
+class SincronizacionTests(TransactionTestCase):
+    def _cambios(self, desde=None, **extra):
+        params = {"desde": desde, **extra} if desde else extra
+        return self.client.get("/api/productos/cambios/", params).json()
+
+    def test_solo_lo_que_cambio_y_lapidas(self):
+        a, b, c = crear_productos(3)
+        todo = self._cambios()
+        self.assertEqual({p["id"] for p in todo["productos"]}, {a.pk, b.pk, c.pk})
+        self.assertEqual(self._cambios(todo["cursor"])["productos"], [])
+
+        confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        Producto.objects.filter(pk=b.pk).update(activo=False)
+        borrado = c.pk
+        c.delete()
+        datos = self._cambios(todo["cursor"])
+        self.assertEqual([(p["id"], p["stock"]) for p in datos["productos"]], [(a.pk, 9)])
+        self.assertEqual(sorted(datos["eliminados"]), [b.pk, borrado])
+        self.assertEqual(self._cambios(datos["cursor"])["productos"], [])
+
+    def test_por_paginas(self):
+        productos = crear_productos(5)
+        ids, cursor, hay_mas = [], None, True
+        while hay_mas:
+            datos = self._cambios(cursor, limite=2) if cursor else self._cambios(limite=2)
+            ids += [p["id"] for p in datos["productos"]]
+            cursor, hay_mas = datos["cursor"], datos["hay_mas"]
+        self.assertEqual(sorted(ids), [p.pk for p in productos])
+
+    def test_cursor_invalido(self):
+        resp = self.client.get("/api/productos/cambios/", {"desde": "abc"})
+        self.assertEqual(resp.status_code, 400)
+
+
+class StockBajoTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _lista(self, **headers):
+        return self.client.get("/api/alertas/stock-bajo/", headers=headers)
+
+    def test_columna_calculada_en_todas_las_escrituras(self):
+        a, b = crear_productos(2, stock=3)
+        Producto.objects.filter(pk=a.pk).update(stock_minimo=5)
+        self.assertEqual([p["id"] for p in self._lista().json()], [a.pk])
+        registrar_recepcion([(a.pk, 10, Decimal("60"))])
+        self.assertEqual(self._lista().json(), [])
+
+    def test_cache_solo_cambia_si_cambia_la_lista(self):
+        a, b = crear_productos(2, stock=3)
+        Producto.objects.filter(pk=a.pk).update(stock_minimo=5)
+        primera = self._lista()
+        etag = primera["ETag"]
+
+        # Venta de un producto que no está en la lista: misma respuesta, 304 y sin serializar
+        confirmar_venta(FakeCart([(b.pk, 1, "100.00")]))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._lista(If_None_Match=etag).status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._lista().json(), primera.json())
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        # Venta del que está en la lista: cambia su stock en la respuesta
+        confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        resp = self._lista(If_None_Match=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()[0]["stock"], 2)
+
+
+class BandejaSalidaTests(TestCase):
+    def test_eventos_en_la_misma_transaccion(self):
+        a, b = crear_productos(2, stock=6)
+        Producto.objects.filter(pk=a.pk).update(stock_minimo=5)
+        confirmar_venta(FakeCart([(a.pk, 2, "100.00"), (b.pk, 1, "100.00")]))
+        self.assertEqual(
+            list(EventoSalida.objects.values_list("tipo", "datos__stock")),
+            [(EventoSalida.VENTA_CONFIRMADA, None), (EventoSalida.STOCK_BAJO, 4)],
+        )
+
+        registrar_recepcion([(a.pk, 10, Decimal("60"))])
+        cargar_csv(io.BytesIO(b"producto,categoria,proveedor,cantidad,costo_unitario,sku\nX,,,1,1,T-1\n"))
+        self.assertEqual(EventoSalida.objects.last().tipo, EventoSalida.STOCK_REPUESTO)
+        self.assertEqual(EventoSalida.objects.count(), 3)
+
+        with self.assertRaises(StockInsuficiente):
+            confirmar_venta(FakeCart([(a.pk, 999, "100.00")]))
+        self.assertEqual(EventoSalida.objects.count(), 3)
+
+    def test_despacho_por_lotes_con_reintento(self):
+        a, = crear_productos(1)
+        for _ in range(3):
+            confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        enviados = []
+
+        def caido(url, cuerpo, headers):
+            raise ConnectionError("sin conexión")
+
+        self.assertEqual(despachar_lote("http://x", "clave", enviar=caido), (0, 3))
+        self.assertEqual(despachar_lote("http://x", enviar=caido), (0, 0))  # esperan el reintento
+        evento = EventoSalida.objects.first()
+        self.assertEqual((evento.intentos, evento.ultimo_error), (1, "sin conexión"))
+
+        EventoSalida.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(
+            despachar_lote("http://x", "clave", lote=2, enviar=lambda u, c, h: enviados.append((c, h))),
+            (2, 0),
+        )
+        cuerpo, headers = enviados[0]
+        self.assertTrue(headers["X-Placacenter-Firma"].startswith("sha256="))
+        self.assertEqual(len(json.loads(cuerpo)["eventos"]), 2)
+        self.assertEqual(EventoSalida.objects.filter(enviado__isnull=True).count(), 1)
+
+    def test_reserva_y_descarte_tras_max_intentos(self):
+        a, = crear_productos(1)
+        confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        otros = []
+
+        def caido(url, cuerpo, headers):
+            # Mientras se espera al webhook el lote está reservado para otros despachadores
+            otros.append(despachar_lote("http://x", enviar=caido))
+            raise ConnectionError("500")
+
+        for _ in range(despacho.MAX_INTENTOS):
+            self.assertEqual(despachar_lote("http://x", enviar=caido), (0, 1))
+            EventoSalida.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(set(otros), {(0, 0)})
+        evento = EventoSalida.objects.get()
+        self.assertEqual(evento.intentos, despacho.MAX_INTENTOS)
+        self.assertIsNotNone(evento.descartado)
+        self.assertEqual(despachar_lote("http://x", enviar=caido), (0, 0))
+
+        # Un despachador que murió con el lote reservado: se retoma al vencer la reserva
+        confirmar_venta(FakeCart([(a.pk, 1, "100.00")]))
+        self.assertEqual(len(despacho.reservar()), 1)
+        self.assertEqual(despacho.reservar(), [])
+        EventoSalida.objects.filter(enviado__isnull=True, descartado__isnull=True).update(
+            proximo_intento=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(despachar_lote("http://x", enviar=lambda u, c, h: None), (1, 0))
+
+
+    def test_despachador_sobrevive_a_la_caida_de_la_base(self):
+        from .management.commands import despachar_eventos as comando
+        respuestas = iter([OperationalError("server closed the connection"), (0, 0)])
+
+        def despachar(*args):
+            r = next(respuestas)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        salida = io.StringIO()
+        with mock.patch.object(comando, "despachar_lote", despachar), \
+                mock.patch.object(comando, "connection") as conexion, \
+                mock.patch.object(comando, "close_old_connections"), \
+                mock.patch.object(comando.time, "sleep"):
+            call_command("despachar_eventos", "--url", "http://x", "--una-vez", stdout=salida, stderr=salida)
+        conexion.close.assert_called_once()
+        self.assertIn("Sin conexión a la base", salida.getvalue())
+
+
+class ReposicionTests(TestCase):
+    def _salida(self, producto, cantidad, dias_atras):
+        m = MovimientoInventario.objects.create(producto=producto, tipo="SALIDA", cantidad=cantidad)
+        MovimientoInventario.objects.filter(pk=m.pk).update(fecha=timezone.now() - timedelta(days=dias_atras))
+
+    def test_sugerencias_vectorizadas(self):
+        a, inactivo, b = crear_productos(3, stock=5)
+        Producto.objects.filter(pk=inactivo.pk).update(activo=False)
+        for dia in range(1, 29):
+            self._salida(a, 2, dia)
+            self._salida(inactivo, 50, dia)
+        self._salida(a, 100, 0)  # hoy todavía no cuenta
+
+        self.assertEqual(calcular_reposicion(dias=90), 2)
+        sa = SugerenciaReposicion.objects.get(producto=a)
+        self.assertEqual(sa.venta_diaria, 2.0)
+        self.assertAlmostEqual(sa.desviacion, 0.926, places=3)
+        self.assertEqual(sa.dias_cobertura, 2.5)
+        # 2 * 7 + 1.65 * 0.926 * raíz(7) = 18.04 -> 19; pedir 19 + 2 * 14 - 5
+        self.assertEqual((sa.punto_reorden, sa.cantidad_sugerida), (19, 42))
+
+        sb = SugerenciaReposicion.objects.get(producto=b)
+        self.assertEqual((sb.venta_diaria, sb.dias_cobertura, sb.cantidad_sugerida), (0.0, None, 0))
+        self.assertFalse(SugerenciaReposicion.objects.filter(producto=inactivo).exists())
+
+        calcular_reposicion(dias=90, lote=1)
+        self.assertEqual(SugerenciaReposicion.objects.get(producto=a).cantidad_sugerida, 42)
+        self.assertEqual(SugerenciaReposicion.objects.count(), 2)
+
+    @override_settings(STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    })
+    def test_vista_por_paginas(self):
+        productos = crear_productos(3)
+        SugerenciaReposicion.objects.bulk_create(
+            SugerenciaReposicion(producto=p, stock=0, venta_diaria=1, desviacion=0, punto_reorden=7,
+                                 cantidad_sugerida=21, calculado=timezone.now())
+            for p in productos
+        )
+        self.client.force_login(User.objects.create_user("compras", password="clave-segura"))
+        with mock.patch("core.views.REPOSICION_POR_PAGINA", 2):
+            resp = self.client.get("/inventario/reposicion/")
+            self.assertEqual(len(resp.context["sugerencias"]), 2)
+            self.assertEqual(resp.context["siguiente"], "?pagina=2")
+            resp = self.client.get("/inventario/reposicion/", {"pagina": 2})
+            self.assertEqual(len(resp.context["sugerencias"]), 1)
+            self.assertEqual(resp.context["anterior"], "?pagina=1")
+
+
+class ParticionesTests(TestCase):
+    def _particion(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {particiones.TABLA} WHERE id = %s", [pk])
+            return cursor.fetchone()[0]
+
+    def test_convertir_y_crear_meses(self):
+        a, = crear_productos(1)
+        viejo = MovimientoInventario.objects.create(producto=a, tipo="ENTRADA", cantidad=3)
+        MovimientoInventario.objects.filter(pk=viejo.pk).update(fecha=timezone.now() - timedelta(days=400))
+
+        self.assertEqual(particiones.crear_meses(), 0)  # sin particionar no hace nada
+        self.assertGreaterEqual(particiones.convertir(meses_adelante=1), 15)
+        self.assertIsNone(particiones.convertir())
+        self.assertEqual(MovimientoInventario.objects.get(pk=viejo.pk).cantidad, 3)
+
+        confirmar_venta(FakeCart([(a.pk, 2, "100.00")]))
+        nuevo = MovimientoInventario.objects.get(tipo="SALIDA")
+        self.assertGreater(nuevo.pk, viejo.pk)
+        self.assertEqual(self._particion(nuevo.pk), f"{particiones.TABLA}_p{timezone.localtime():%Y_%m}")
+
+        # Una fecha sin mes creado cae en DEFAULT y pasa a su partición al crearla
+        MovimientoInventario.objects.filter(pk=nuevo.pk).update(fecha=timezone.now() + timedelta(days=120))
+        self.assertEqual(self._particion(nuevo.pk), particiones.DEFAULT)
+        self.assertGreaterEqual(particiones.crear_meses(meses_adelante=5), 1)
+        self.assertNotEqual(self._particion(nuevo.pk), particiones.DEFAULT)
+
+
+class KardexTests(TestCase):
+    def setUp(self):
+        self.a, = crear_productos(1, stock=0)
+        Producto.objects.filter(pk=self.a.pk).update(costo_promedio=0)
+        registrar_recepcion([(self.a.pk, 10, Decimal("50"))])
+        registrar_recepcion([(self.a.pk, 10, Decimal("70"))])
+        confirmar_venta(FakeCart([(self.a.pk, 5, "100.00")]))  # sale al promedio: 60
+        registrar_recepcion([(self.a.pk, 5, Decimal("90"))])
+
+    def test_acumulados_y_paginas(self):
+        _, _, filas, siguiente = kardex.pagina(self.a.pk)
+        self.assertIsNone(siguiente)
+        self.assertEqual(
+            [(f["entrada"], f["salida"], f["saldo"], f["valor"], f["costo_promedio"]) for f in filas],
+            [
+                (10, 0, 10, Decimal("500.00"), Decimal("50.00")),
+                (10, 0, 20, Decimal("1200.00"), Decimal("60.00")),
+                (0, 5, 15, Decimal("900.00"), Decimal("60.00")),
+                (5, 0, 20, Decimal("1350.00"), Decimal("67.50")),
+            ],
+        )
+        self.a.refresh_from_db()
+        self.assertEqual((self.a.stock, self.a.costo_promedio), (20, Decimal("67.50")))
+
+        # Página por página da lo mismo, y cada página lee solo sus filas
+        vistas, cursor = [], None
+        while True:
+            _, _, pagina, cursor = kardex.pagina(self.a.pk, cursor, tamano=3)
+            vistas += pagina
+            if cursor is None:
+                break
+        self.assertEqual(vistas, filas)
+        with self.assertRaises(kardex.CursorInvalido):
+            kardex.pagina(self.a.pk + 1, kardex.pagina(self.a.pk, tamano=1)[3])
+
+    def test_api_y_csv(self):
+        MovimientoInventario.objects.filter(producto=self.a, cantidad=10).update(fecha=timezone.now() - timedelta(days=3))
+        self.client.force_login(User.objects.create_user("contador", password="clave-segura"))
+        url = f"/api/productos/{self.a.pk}/kardex/"
+        hoy = timezone.localdate().isoformat()
+
+        r = self.client.get(url, {"desde": hoy, "tamano": 1})
+        datos = r.json()
+        self.assertEqual((datos["saldo_anterior"], datos["valor_anterior"]), (20, "1200.00"))
+        self.assertEqual(datos["movimientos"][0]["saldo"], 15)
+        self.assertTrue(datos["hay_mas"])
+        r = self.client.get(url, {"cursor": datos["cursor"]})
+        self.assertEqual(r.json()["movimientos"][0]["costo_promedio"], "67.50")
+        self.assertEqual(self.client.get(url, {"desde": "ayer"}).status_code, 400)
+
+        r = self.client.get(url, {"formato": "csv", "desde": hoy})
+        lineas = list(csv.reader(io.StringIO(b"".join(r.streaming_content).decode())))
+        self.assertEqual(lineas[0][:2], ["fecha", "tipo"])
+        self.assertEqual([l[7] for l in lineas[1:]], ["15", "20"])
+        r = self.client.get(f"/productos/{self.a.pk}/kardex/", {"formato": "csv"})
+        self.assertEqual(len(list(r.streaming_content)), 5)
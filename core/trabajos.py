@@ -0,0 +1,115 @@
+# core/trabajos.py
+import io
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .importacion import ArchivoInvalido, procesar_csv
+from .models import TrabajoImportacion
+
+logger = logging.getLogger(__name__)
+
+LATIDO_VENCIDO = timedelta(minutes=5)   # sin latido por este tiempo = worker caído
+
+
+def encolar_importacion(archivo, usuario=None):
+    """Guarda el CSV subido en la base y deja el trabajo pendiente; no procesa nada aquí."""
+    return TrabajoImportacion.objects.create(
+        contenido=archivo.read(),
+        nombre_archivo=archivo.name[:255],
+        usuario=usuario if usuario and usuario.is_authenticated else None,
+    )
+
+
+def tomar_pendiente():
+    """
+    Marca como PROCESANDO el trabajo pendiente más antiguo y lo devuelve.
+    SKIP LOCKED deja que varios hilos/procesos tomen trabajos distintos.
+    """
+    with transaction.atomic():
+        trabajo = (
+            TrabajoImportacion.objects
+            .select_for_update(skip_locked=True)
+            .defer("contenido")
+            .filter(estado="PENDIENTE")
+            .order_by("creado")
+            .first()
+        )
+        if trabajo is None:
+            return None
+        trabajo.estado = "PROCESANDO"
+        trabajo.iniciado = trabajo.latido = timezone.now()
+        trabajo.save(update_fields=["estado", "iniciado", "latido"])
+    return trabajo
+
+
+def _guardar_progreso(trabajo_id, resultado, filas_leidas):
+    TrabajoImportacion.objects.filter(pk=trabajo_id).update(
+        filas_procesadas=filas_leidas,
+        filas_ok=resultado.filas_ok,
+        filas_rechazadas=resultado.filas_rechazadas,
+        latido=timezone.now(),
+    )
+
+
+def latir(trabajo_ids):
+    """Renueva el latido de los trabajos que este worker tiene en curso."""
+    if trabajo_ids:
+        TrabajoImportacion.objects.filter(pk__in=trabajo_ids, estado="PROCESANDO").update(latido=timezone.now())
+
+
+def ejecutar_importacion(trabajo):
+    """Corre un trabajo ya tomado con tomar_pendiente() y guarda el resultado."""
+    campos = {"terminado": None}
+    try:
+        contenido = TrabajoImportacion.objects.values_list("contenido", flat=True).get(pk=trabajo.pk)
+        with io.BytesIO(contenido) as archivo:
+            resultado = procesar_csv(
+                archivo,
+                al_avanzar=lambda r, n: _guardar_progreso(trabajo.pk, r, n),
+            )
+        campos.update(
+            estado="TERMINADO",
+            mensaje=resultado.mensaje(),
+            errores=[[num, msg] for num, msg in resultado.errores],
+        )
+    except ArchivoInvalido as e:
+        campos.update(estado="ERROR", mensaje=str(e))
+    except Exception as e:
+        logger.exception("Falló la importación %s", trabajo.pk)
+        campos.update(estado="ERROR", mensaje=f"Error inesperado: {e}")
+    finally:
+        campos["terminado"] = timezone.now()
+        # El CSV ya no se necesita; sin esto la tabla crece con cada archivo
+        TrabajoImportacion.objects.filter(pk=trabajo.pk).update(contenido=b"", **campos)
+
+
+def ejecutar_en_hilo(trabajo):
+    """Igual que ejecutar_importacion, cerrando la conexión propia del hilo al final."""
+    try:
+        ejecutar_importacion(trabajo)
+    finally:
+        connection.close()
+
+
+def marcar_interrumpidos(vencido=LATIDO_VENCIDO):
+    """
+    Trabajos que quedaron PROCESANDO porque su worker se cayó: los que no
+    renuevan el latido hace más de `vencido`. Los de otros workers vivos
+    (otras réplicas) siguen latiendo y no se tocan. Los lotes ya
+    confirmados no se deshacen, así que no se reintentan solos.
+    """
+    limite = timezone.now() - vencido
+    return (
+        TrabajoImportacion.objects
+        .filter(estado="PROCESANDO")
+        .filter(Q(latido__lt=limite) | Q(latido__isnull=True, iniciado__lt=limite))
+        .update(
+            estado="ERROR",
+            mensaje="Importación interrumpida: el worker se detuvo. Revisa las filas procesadas antes de volver a subir el archivo.",
+            terminado=timezone.now(),
+        )
+    )
@@ -0,0 +1,121 @@
+# core/typeahead.py
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from heapq import nsmallest
+
+from . import versiones
+from .models import Producto
+
+# Cada cuánto (segundos) un worker revisa si cambió el catálogo.
+# Entre revisiones las sugerencias salen solo de memoria.
+INTERVALO_REVISION = 1.0
+
+
+def plegar(texto):
+    """Minúsculas y sin tildes: 'Tornillería' -> 'tornilleria'."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+class IndicePrefijos:
+    """
+    Índice en memoria de nombre/SKU de los productos activos.
+    Cada palabra del nombre y el SKU completo quedan en una lista ordenada;
+    un prefijo se resuelve con búsqueda binaria. `resolver` lleva un código
+    escaneado a (id, precio_venta) en O(1).
+    """
+
+    def __init__(self, filas):
+        # filas: (id, nombre, sku, precio_venta), se ordenan por nombre plegado
+        filas = sorted(filas, key=lambda f: plegar(f[1]))
+        self.productos = [
+            {"id": pid, "nombre": nombre, "sku": sku, "precio": str(precio)}
+            for pid, nombre, sku, precio in filas
+        ]
+        # El SKU es único distinguiendo mayúsculas ("ab-1" y "AB-1" son dos
+        # productos): primero se busca exacto y sin distinguir solo si no
+        # hay otro que se escriba igual (None marca los ambiguos)
+        self.por_sku = {}
+        self._por_sku_mayus = {}
+        for pid, _, sku, precio in filas:
+            sku = (sku or "").strip()
+            self.por_sku[sku] = (pid, precio)
+            clave = sku.upper()
+            self._por_sku_mayus[clave] = None if clave in self._por_sku_mayus else (pid, precio)
+        claves = []
+        for i, (_, nombre, sku, _) in enumerate(filas):
+            for token in set(plegar(nombre).split()) | {plegar(sku)}:
+                claves.append((token, i))
+        claves.sort()
+        self._tokens = [t for t, _ in claves]
+        self._posiciones = [i for _, i in claves]
+
+    def resolver(self, sku):
+        """(id, precio_venta) del SKU exacto o, si no, del único que coincide sin mayúsculas."""
+        sku = (sku or "").strip()
+        return self.por_sku.get(sku) or self._por_sku_mayus.get(sku.upper())
+
+    def _con_prefijo(self, prefijo):
+        lo = bisect_left(self._tokens, prefijo)
+        hi = bisect_left(self._tokens, prefijo + "\uffff", lo)
+        return set(self._posiciones[lo:hi])
+
+    def buscar(self, q, limite=10):
+        palabras = plegar(q).split()
+        if not palabras:
+            return []
+        candidatos = None
+        for palabra in palabras:
+            encontrados = self._con_prefijo(palabra)
+            candidatos = encontrados if candidatos is None else candidatos & encontrados
+            if not candidatos:
+                return []
+        return [self.productos[i] for i in nsmallest(limite, candidatos)]
+
+
+_lock = threading.Lock()
+_indice = None
+_version = None
+_revisado = 0.0
+
+
+def _construir():
+    filas = Producto.objects.filter(activo=True).values_list("id", "nombre", "sku", "precio_venta")
+    return IndicePrefijos(filas.iterator(chunk_size=5000))
+
+
+def obtener_indice():
+    """Índice del worker; se reconstruye si el contador 'catalogo' cambió."""
+    global _indice, _version, _revisado
+    ahora = time.monotonic()
+    if _indice is not None and ahora - _revisado < INTERVALO_REVISION:
+        return _indice
+    with _lock:
+        if _indice is not None and time.monotonic() - _revisado < INTERVALO_REVISION:
+            return _indice
+        version = versiones.leer(versiones.CATALOGO)
+        if _indice is None or version != _version:
+            _indice = _construir()
+            _version = version
+        _revisado = time.monotonic()
+        return _indice
+
+
+def precargar():
+    """Arma el índice al arrancar el worker (lo llama placacenter/wsgi.py)."""
+    try:
+        obtener_indice()
+    except Exception:
+        # Sin base todavía (build, migraciones): se arma en la primera consulta.
+        pass
+
+
+def sugerencias(q, limite=10):
+    return obtener_indice().buscar(q, limite)
+
+
+def resolver_sku(sku):
+    """(id, precio_venta) del producto activo con ese SKU, o None."""
+    return obtener_indice().resolver(sku)
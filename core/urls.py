@@ -2,15 +2,18 @@ from django.urls import path
 from django.shortcuts import redirect
 from .views import (
     signin_view, login_local_view, signup_view,
-    principal_view, gestion_home_view, ventas_view,
+    principal_view, gestion_home_view, ventas_view, ventas_sugerencias,
+    ventas_categoria_productos,
     CategoriaListView, CategoriaCreateView, CategoriaUpdateView,
     ProveedorListView, ProveedorCreateView, ProveedorUpdateView,
-    ProductoListView, ProductoCreateView, ProductoUpdateView,
+    ProductoListView, ProductoCreateView, ProductoUpdateView, producto_kardex_view,
     entrada_stock_view,
     # carrito
     cart_partial, cart_add, cart_dec, cart_remove, cart_empty, ventas_confirmar,
+    cart_scan, cart_scan_lote,
     # para inventario
-    inventario_entradas_view, inventario_entradas_pdf,
+    inventario_entradas_view, inventario_entradas_pdf, inventario_importacion_progreso,
+    inventario_recepcion_view, inventario_reposicion_view,
 
     #reporte de ventas
     reporte_ventas_view,
@@ -31,10 +34,14 @@ urlpatterns = [
     # Ventas
     path('ventas/', ventas_view, name='ventas'),
     path('ventas/', ventas_view, name='ventas_home'),
+    path('ventas/sugerencias/', ventas_sugerencias, name='ventas_sugerencias'),
+    path('ventas/categoria/<int:categoria_id>/', ventas_categoria_productos, name='ventas_categoria_productos'),
 
     # Carrito 
     path('ventas/cart/', cart_partial, name='cart_partial'),
     path('ventas/add/<int:producto_id>/', cart_add, name='cart_add'),
+    path('ventas/scan/', cart_scan_lote, name='cart_scan_lote'),
+    path('ventas/scan/<path:sku>/', cart_scan, name='cart_scan'),
     path('ventas/dec/<int:producto_id>/', cart_dec, name='cart_dec'),
     path('ventas/remove/<int:producto_id>/', cart_remove, name='cart_remove'),
     path('ventas/empty/', cart_empty, name='cart_empty'),
@@ -53,10 +60,14 @@ urlpatterns = [
     path('productos/', ProductoListView.as_view(), name='productos_list'),
     path('productos/nuevo/', ProductoCreateView.as_view(), name='producto_create'),
     path('productos/<int:pk>/editar/', ProductoUpdateView.as_view(), name='producto_update'),
+    path('productos/<int:pk>/kardex/', producto_kardex_view, name='producto_kardex'),
 
     path('inventario/', inventario_entradas_view, name='inventario_entradas'),
     path('inventario/pdf/', inventario_entradas_pdf, name='inventario_entradas_pdf'),
+    path('inventario/importaciones/<int:trabajo_id>/', inventario_importacion_progreso, name='inventario_importacion_progreso'),
     path('inventario/entrada/<int:producto_id>/', entrada_stock_view, name='entrada_stock'),
+    path('inventario/recepcion/', inventario_recepcion_view, name='inventario_recepcion'),
+    path('inventario/reposicion/', inventario_reposicion_view, name='inventario_reposicion'),
     
     #reporte de ventas
     path('reportes/ventas/', reporte_ventas_view, name='reporte_ventas'),
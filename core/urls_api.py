@@ -5,6 +5,7 @@ from .views import (
     ProveedorViewSet,
     ProductoViewSet,
     ProductosStockBajoList,
+    RecepcionAPIView,
 )
 
 router = DefaultRouter()
@@ -15,6 +16,7 @@ router.register(r'productos',  ProductoViewSet)
 urlpatterns = [
     # NUEVO: endpoint para la Lambda
     path('alertas/stock-bajo/', ProductosStockBajoList.as_view(), name='alertas-stock-bajo'),
+    path('recepciones/', RecepcionAPIView.as_view(), name='recepciones'),
 
     # Rutas de los viewsets
     path('', include(router.urls)),
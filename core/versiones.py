@@ -0,0 +1,51 @@
+# core/versiones.py
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+from .models import Contador
+
+CATALOGO = "catalogo"
+INVENTARIO = "inventario"
+SKU_CSV = "sku_csv"
+
+
+def leer(nombre):
+    """Valor actual del contador (0 si todavía no existe)."""
+    valor = Contador.objects.filter(nombre=nombre).values_list("valor", flat=True).first()
+    return valor or 0
+
+
+def incrementar(nombre):
+    """Sube el contador en 1 con un UPDATE atómico; lo crea la primera vez."""
+    if Contador.objects.filter(nombre=nombre).update(valor=F("valor") + 1, actualizado=Now()):
+        return
+    try:
+        with transaction.atomic():
+            Contador.objects.create(nombre=nombre, valor=1)
+    except IntegrityError:
+        # Otro proceso lo creó al mismo tiempo.
+        Contador.objects.filter(nombre=nombre).update(valor=F("valor") + 1, actualizado=Now())
+
+
+def incrementar_al_confirmar(nombre):
+    """
+    Sube el contador cuando termina la transacción actual (o ya, si no hay).
+    Para contadores que tocan todas las ventas: la fila no queda bloqueada
+    mientras dura la transacción.
+    """
+    transaction.on_commit(lambda: incrementar(nombre))
+
+
+def reservar(nombre, cantidad):
+    """
+    Reserva `cantidad` valores consecutivos del contador y devuelve el primero.
+    La fila queda bloqueada hasta el fin de la transacción, así dos procesos
+    nunca reciben el mismo número.
+    """
+    with transaction.atomic():
+        contador, _ = Contador.objects.select_for_update().get_or_create(nombre=nombre)
+        inicio = contador.valor + 1
+        contador.valor += cantidad
+        contador.save(update_fields=["valor", "actualizado"])
+    return inicio
@@ -1,6 +1,7 @@
 from decimal import Decimal
-from urllib.parse import quote
+from urllib.parse import quote, urlencode
 from types import SimpleNamespace  
+import csv
 import re
 from django import forms
 from django.conf import settings
@@ -10,29 +11,44 @@ from django.contrib.auth import login as dj_login, logout as dj_logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import transaction
-from django.db.models import Q, F
-from collections import OrderedDict
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
 from datetime import datetime, date, timedelta
-from django.http import HttpResponseBadRequest, HttpResponse
+from django.http import FileResponse, HttpResponseBadRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.http import require_GET
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag, require_GET, require_POST
 from django.views.generic import ListView, CreateView, UpdateView
 from django.template.loader import render_to_string
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from authlib.integrations.django_client import OAuth
-import csv         
-import io 
-from .models import Categoria, Proveedor, Producto, MovimientoInventario
-from .serializers import CategoriaSerializer, ProveedorSerializer, ProductoSerializer
-from .forms import CategoriaForm, ProveedorForm, ProductoForm, EntradaStockForm
+from .models import Categoria, Proveedor, Producto, SugerenciaReposicion, TrabajoImportacion
+from .serializers import CategoriaSerializer, ProveedorSerializer, ProductoSerializer, RecepcionSerializer, MovimientoKardexSerializer, campos_pedidos
+from .forms import CategoriaForm, ProveedorForm, ProductoForm, EntradaStockForm, RecepcionForm, LineasRecepcionFormSet
 from .cart import Cart  
+from .checkout import confirmar_venta, StockInsuficiente
+from .entradas import ProductosInexistentes, registrar_entrada, registrar_recepcion
+from .busqueda import buscar_productos, ProductoSearchFilter
+from . import kardex
+from .alertas import datos_en_cache, huella_stock_bajo
+from .condicional import GetCondicionalMixin
+from .sincronizacion import cambios_desde, LIMITE as LIMITE_CAMBIOS
+from .typeahead import sugerencias, resolver_sku
+from .pdf_inventario import abrir_pdf_en_cache, etag_inventario
+from .trabajos import encolar_importacion
+from .reportes import inicio_del_dia, ventas_por_periodo, TIPOS as TIPOS_REPORTE
 
 User = get_user_model()
 
+_COLUMNAS_PRODUCTO = {f.name for f in Producto._meta.concrete_fields}
+
 #  LOGIN LOCAL + REGISTRO
 class SignInForm(forms.Form):
     username = forms.CharField(
@@ -169,25 +185,33 @@ def principal_view(request):
 def gestion_home_view(request):
     return redirect("productos_list")
 
+VENTAS_POR_PAGINA = 48
+VENTAS_MAX_RESULTADOS = 120
+
+
 @login_required
 def ventas_view(request):
     """
     Ventas:
-      - Agrupa por categoría (incluye 'Sin categoría').
-      - Búsqueda por nombre o SKU.
+      - Sin búsqueda: solo pinta los encabezados de categoría; los productos
+        de cada una llegan por htmx en páginas (ventas_categoria_productos).
+      - Con búsqueda (core/busqueda.py): los mejores resultados agrupados por
+        categoría, con un tope para que la página no crezca con el catálogo.
     """
     q = (request.GET.get("q") or "").strip()
 
-    base_qs = (
-        Producto.objects
-        .select_related("categoria")
-        .order_by("nombre")
-    )
-    if q:
-        base_qs = base_qs.filter(
-            Q(nombre__icontains=q) |
-            Q(sku__icontains=q)
+    if not q:
+        categorias = (
+            Categoria.objects
+            .annotate(num_productos=Count("productos"))
+            .filter(num_productos__gt=0)
+            .order_by("nombre")
         )
+        return render(request, "core/ventas.html", {"categorias": categorias, "q": q})
+
+    base_qs = buscar_productos(
+        Producto.objects.select_related("categoria").order_by("nombre"), q
+    )[:VENTAS_MAX_RESULTADOS]
 
     grupos_dict = {}
     for p in base_qs:
@@ -201,6 +225,56 @@ def ventas_view(request):
     return render(request, "core/ventas.html", {"grupos": grupos, "q": q})
 
 
+@login_required
+@require_GET
+def ventas_categoria_productos(request, categoria_id):
+    """
+    Una página de productos de una categoría para la pantalla de ventas (parcial htmx).
+    Paginación por llave (nombre, id): cada página cuesta lo mismo sin
+    importar qué tan adentro de la categoría esté.
+    """
+    productos = (
+        Producto.objects
+        .filter(categoria_id=categoria_id)
+        .only("id", "nombre", "sku", "precio_venta")
+        .order_by("nombre", "id")
+    )
+    despues_nombre = request.GET.get("despues_nombre")
+    despues_id = request.GET.get("despues_id")
+    if despues_nombre is not None and despues_id:
+        try:
+            despues_id = int(despues_id)
+        except ValueError:
+            return HttpResponseBadRequest("Cursor inválido.")
+        productos = productos.filter(
+            Q(nombre__gt=despues_nombre) | Q(nombre=despues_nombre, id__gt=despues_id)
+        )
+
+    pagina = list(productos[:VENTAS_POR_PAGINA + 1])
+    siguiente = None
+    if len(pagina) > VENTAS_POR_PAGINA:
+        pagina = pagina[:VENTAS_POR_PAGINA]
+        ultimo = pagina[-1]
+        siguiente = "?" + urlencode({"despues_nombre": ultimo.nombre, "despues_id": ultimo.id})
+
+    return render(request, "core/_ventas_productos.html", {
+        "productos": pagina,
+        "categoria_id": categoria_id,
+        "siguiente": siguiente,
+    })
+
+
+@login_required
+@require_GET
+def ventas_sugerencias(request):
+    """
+    Sugerencias para la caja de búsqueda de ventas (JSON).
+    Salen del índice en memoria del worker (core/typeahead.py), sin ir a la base.
+    """
+    q = (request.GET.get("q") or "").strip()
+    return JsonResponse({"q": q, "resultados": sugerencias(q)})
+
+
 #  Auth0 (OAuth / OIDC)
 oauth = OAuth()
 if not getattr(oauth, "auth0", None):
@@ -291,12 +365,7 @@ class ProductoListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         qs = super().get_queryset().select_related("categoria", "proveedor")
-        q = (self.request.GET.get("q") or "").strip()
-        if q:
-            qs = qs.filter(
-                Q(nombre__icontains=q) |
-                Q(sku__icontains=q)
-            )
+        qs = buscar_productos(qs, self.request.GET.get("q"))
         categoria = self.request.GET.get("categoria")
         if categoria:
             qs = qs.filter(categoria_id=categoria)
@@ -314,6 +383,68 @@ class ProductoUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "producto_form.html"
     def get_success_url(self): return reverse("productos_list")
 
+def _fecha_desde(texto):
+    """"YYYY-MM-DD" como medianoche local; None si viene vacía. ValueError si no es fecha."""
+    if not texto:
+        return None
+    try:
+        return inicio_del_dia(datetime.strptime(texto, "%Y-%m-%d").date())
+    except ValueError:
+        raise ValueError("Fecha inválida; use AAAA-MM-DD.")
+
+
+class _Eco:
+    """Para csv.writer: devuelve cada línea en vez de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+def _kardex_csv(producto, desde):
+    escritor = csv.writer(_Eco())
+    columnas = ["fecha", "tipo", "motivo", "venta", "entrada", "salida", "costo_unitario", "saldo", "valor", "costo_promedio"]
+
+    def lineas():
+        yield escritor.writerow(columnas)
+        for f in kardex.filas_todas(producto.pk, desde):
+            f["fecha"] = timezone.localtime(f["fecha"]).strftime("%Y-%m-%d %H:%M:%S")
+            yield escritor.writerow([f[c] if f[c] is not None else "" for c in columnas])
+
+    respuesta = StreamingHttpResponse(lineas(), content_type="text/csv; charset=utf-8")
+    respuesta["Content-Disposition"] = f'attachment; filename="kardex-{quote(producto.sku)}.csv"'
+    return respuesta
+
+
+@login_required
+def producto_kardex_view(request, pk):
+    """
+    Kardex del producto con saldo y costo promedio acumulados (core/kardex.py).
+    ?desde=YYYY-MM-DD arranca en esa fecha con el saldo anterior; ?cursor= es
+    la página siguiente; ?formato=csv descarga todo desde `desde`.
+    """
+    producto = get_object_or_404(Producto, pk=pk)
+    desde_str = request.GET.get("desde") or ""
+    try:
+        desde = _fecha_desde(desde_str)
+    except ValueError:
+        desde, desde_str = None, ""
+
+    if request.GET.get("formato") == "csv":
+        return _kardex_csv(producto, desde)
+
+    try:
+        saldo, valor, filas, siguiente = kardex.pagina(producto.pk, request.GET.get("cursor"), desde)
+    except kardex.CursorInvalido:
+        return HttpResponseBadRequest("Cursor inválido.")
+    return render(request, "core/kardex.html", {
+        "producto": producto,
+        "desde": desde_str,
+        "saldo_anterior": saldo,
+        "valor_anterior": valor,
+        "filas": filas,
+        "siguiente": siguiente,
+        "primera_pagina": not request.GET.get("cursor"),
+    })
+
 def entrada_stock_view(request, producto_id):
     producto = get_object_or_404(Producto, pk=producto_id)
     if request.method == "POST":
@@ -323,25 +454,8 @@ def entrada_stock_view(request, producto_id):
             costo_unitario = form.cleaned_data["costo_unitario"]
             motivo = form.cleaned_data.get("motivo")
 
-            with transaction.atomic():
-                MovimientoInventario.objects.create(
-                    producto=producto,
-                    tipo="ENTRADA",
-                    cantidad=cantidad,
-                    costo_unitario=costo_unitario,
-                    motivo=motivo,
-                )
-                total_actual = Decimal(producto.costo_promedio) * producto.stock
-                total_nuevo = Decimal(costo_unitario) * Decimal(cantidad)
-                nuevo_stock = producto.stock + cantidad
-                nuevo_costo = (
-                    (total_actual + total_nuevo) / Decimal(nuevo_stock)
-                    if nuevo_stock else Decimal("0")
-                )
-                producto.stock = nuevo_stock
-                producto.costo_promedio = nuevo_costo.quantize(Decimal("0.01"))
-                producto.save()
-
+            # Stock y costo promedio se calculan en un solo UPDATE (seguro con entradas simultáneas)
+            registrar_entrada(producto.pk, cantidad, costo_unitario, motivo)
             return redirect("productos_list")
     else:
         form = EntradaStockForm(initial={"producto": producto.id})
@@ -353,7 +467,7 @@ def inventario_entradas_view(request):
     """
     Pantalla de inventario:
     - Lista los productos.
-    - Permite importar un CSV (acepta coma o punto y coma).
+    - Permite importar un CSV (acepta coma o punto y coma); se procesa en segundo plano.
     - Desde aquí también se descarga el PDF.
     """
     productos = (
@@ -371,229 +485,111 @@ def inventario_entradas_view(request):
             messages.error(request, "Debes subir un archivo .csv")
             return redirect("inventario_entradas")
 
-        # Leemos el contenido del archivo
-        contenido_bytes = archivo.read()
-        try:
-            contenido = contenido_bytes.decode("utf-8-sig")
-        except UnicodeDecodeError:
-            contenido = contenido_bytes.decode("latin1")
-
-        if not contenido.strip():
-            messages.error(request, "El archivo está vacío.")
-            return redirect("inventario_entradas")
-
-        # Detectar si usa ; o ,
-        primera_linea = contenido.splitlines()[0]
-        if ";" in primera_linea and "," not in primera_linea:
-            delimiter = ";"
-        else:
-            delimiter = ","
-
-        f = io.StringIO(contenido)
-        reader = csv.DictReader(f, delimiter=delimiter)
-
-        if not reader.fieldnames:
-            messages.error(request, "No se encontraron encabezados en el CSV.")
-            return redirect("inventario_entradas")
-
-        # Normalizamos nombres de columnas (quitamos espacios y pasamos a minúsculas)
-        headers = [(h or "").strip().lower() for h in reader.fieldnames]
-        columnas_obligatorias = ["producto", "categoria", "proveedor", "cantidad", "costo_unitario"]
-
-        if not set(columnas_obligatorias).issubset(set(headers)):
-            messages.error(
-                request,
-                "El CSV debe tener las columnas: producto, categoria, proveedor, cantidad, costo_unitario. "
-                "Opcionales: sku, precio_venta."
-            )
-            return redirect("inventario_entradas")
-
-        creadas_cat = creados_prov = creados_prod = filas_ok = 0
-
-        # Procesamos todo el archivo como una sola transacción
-        with transaction.atomic():
-            for fila in reader:
-                # fila es dict con las columnas, aquí las limpiamos
-                fila_norm = {
-                    (k or "").strip().lower(): (v or "").strip()
-                    for k, v in fila.items()
-                }
-
-                nombre_prod = fila_norm.get("producto", "")
-                nombre_cat = fila_norm.get("categoria", "")
-                nombre_prov = fila_norm.get("proveedor", "")
-                sku = fila_norm.get("sku", "")
-
-                if not nombre_prod:
-                    # Si no hay nombre de producto, ignoramos la fila
-                    continue
-
-                # Cantidad
-                try:
-                    cantidad = int(fila_norm.get("cantidad") or "0")
-                except ValueError:
-                    continue
-                if cantidad <= 0:
-                    continue
-
-                # Costo unitario (costo de compra)
-                try:
-                    costo_unitario = Decimal(fila_norm.get("costo_unitario") or "0").quantize(Decimal("0.01"))
-                except Exception:
-                    continue
-
-                # Precio de venta (opcional)
-                precio_venta_valor = None
-                if fila_norm.get("precio_venta"):
-                    try:
-                        precio_venta_valor = Decimal(fila_norm["precio_venta"]).quantize(Decimal("0.01"))
-                    except Exception:
-                        precio_venta_valor = None
-
-                # Categoría
-                categoria = None
-                if nombre_cat:
-                    categoria, creada = Categoria.objects.get_or_create(nombre=nombre_cat)
-                    if creada:
-                        creadas_cat += 1
-
-                # Proveedor
-                proveedor = None
-                if nombre_prov:
-                    proveedor, creado_prov = Proveedor.objects.get_or_create(nombre=nombre_prov)
-                    if creado_prov:
-                        creados_prov += 1
-
-                # Producto
-                producto = None
-                if sku:
-                    # Buscamos por SKU si viene
-                    producto, creado_prod = Producto.objects.get_or_create(
-                        sku=sku,
-                        defaults={
-                            "nombre": nombre_prod,
-                            "categoria": categoria,
-                            "proveedor": proveedor,
-                            "precio_venta": precio_venta_valor or Decimal("0.00"),
-                        }
-                    )
-                    if creado_prod:
-                        creados_prod += 1
-                else:
-                    # Sin SKU: buscamos por nombre + categoría
-                    qs = Producto.objects.filter(nombre__iexact=nombre_prod)
-                    if categoria:
-                        qs = qs.filter(categoria=categoria)
-                    producto = qs.first()
-
-                    if producto is None:
-                        nuevo_sku = f"CSV-{Producto.objects.count() + 1}"
-                        producto = Producto.objects.create(
-                            nombre=nombre_prod,
-                            sku=nuevo_sku,
-                            categoria=categoria,
-                            proveedor=proveedor,
-                            precio_venta=precio_venta_valor or Decimal("0.00"),
-                        )
-                        creados_prod += 1
-
-                # Actualizamos datos básicos
-                if categoria:
-                    producto.categoria = categoria
-                if proveedor:
-                    producto.proveedor = proveedor
-                if precio_venta_valor is not None:
-                    producto.precio_venta = precio_venta_valor
-                producto.save()
-
-                # Recalcular costo promedio y stock (misma lógica que la entrada manual)
-                total_actual = Decimal(producto.costo_promedio) * producto.stock
-                total_nuevo = costo_unitario * Decimal(cantidad)
-                nuevo_stock = producto.stock + cantidad
-                nuevo_costo = (
-                    (total_actual + total_nuevo) / Decimal(nuevo_stock)
-                    if nuevo_stock else Decimal("0")
-                )
-
-                producto.stock = nuevo_stock
-                producto.costo_promedio = nuevo_costo.quantize(Decimal("0.01"))
-                producto.save()
-
-                # Guardamos el movimiento
-                MovimientoInventario.objects.create(
-                    producto=producto,
-                    tipo="ENTRADA",
-                    cantidad=cantidad,
-                    costo_unitario=costo_unitario,
-                    motivo="CARGA CSV",
-                )
-
-                filas_ok += 1
-
-        messages.success(
-            request,
-            f"CSV procesado. Filas correctas: {filas_ok}. "
-            f"Nuevas categorías: {creadas_cat}. Nuevos proveedores: {creados_prov}. Nuevos productos: {creados_prod}."
-        )
+        # Solo se guarda el archivo; lo importa el worker en segundo plano
+        # (manage.py procesar_importaciones, ver core/trabajos.py)
+        encolar_importacion(archivo, request.user)
+        messages.success(request, "Archivo recibido. La importación se está procesando en segundo plano.")
         return redirect("inventario_entradas")
 
     # GET normal: solo mostrar la tabla
     return render(request, "core/inventario_entradas.html", {
         "productos": productos,
+        "trabajos": TrabajoImportacion.objects.all()[:5],
     })
 
 
 @login_required
-def inventario_entradas_pdf(request):
+def inventario_recepcion_view(request):
     """
-    Genera un PDF sencillo con el inventario actual.
+    Recepción de un pedido de proveedor: N líneas (SKU, cantidad, costo
+    unitario) en un solo envío. Todo se aplica en una transacción.
     """
-    productos = (
-        Producto.objects
-        .select_related("categoria", "proveedor")
-        .order_by("nombre")
-    )
+    form = RecepcionForm(request.POST or None)
+    lineas = LineasRecepcionFormSet(request.POST or None, prefix="lineas")
 
-    # Importamos aquí para no romper todo el proyecto si falta la librería
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
+    if request.method == "POST" and form.is_valid() and lineas.is_valid():
+        llenas = [f for f in lineas if f.has_changed() and f.cleaned_data]
+        skus = {f.cleaned_data["sku"].strip() for f in llenas}
+        por_sku = dict(
+            Producto.objects
+            .filter(sku__in=skus | {s.upper() for s in skus})
+            .values_list("sku", "pk")
+        )
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename=\"inventario_placacenter.pdf\"'
+        registros = []
+        for f in llenas:
+            sku = f.cleaned_data["sku"].strip()
+            pid = por_sku.get(sku) or por_sku.get(sku.upper())
+            if pid is None:
+                f.add_error("sku", "No existe un producto con este SKU.")
+                continue
+            registros.append((pid, f.cleaned_data["cantidad"], f.cleaned_data["costo_unitario"]))
+
+        if not llenas:
+            messages.error(request, "Agrega al menos una línea.")
+        elif len(registros) == len(llenas):
+            registrar_recepcion(registros, form.cleaned_data["motivo"] or "RECEPCIÓN")
+            messages.success(request, f"Recepción registrada: {len(registros)} líneas.")
+            return redirect("inventario_entradas")
 
-    p = canvas.Canvas(response, pagesize=letter)
-    width, height = letter
+    return render(request, "core/recepcion.html", {"form": form, "lineas": lineas})
 
-    y = height - 50
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(40, y, "Inventario actual - Placacenter")
 
-    y -= 25
-    p.setFont("Helvetica", 9)
-    p.drawString(40, y, "Nombre")
-    p.drawString(210, y, "SKU")
-    p.drawString(310, y, "Categoría")
-    p.drawString(430, y, "Proveedor")
-    p.drawString(540, y, "Stock")
+REPOSICION_POR_PAGINA = 200
 
-    y -= 18
 
-    for prod in productos:
-        if y < 40:
-            p.showPage()
-            y = height - 40
-            p.setFont("Helvetica", 9)
+@login_required
+def inventario_reposicion_view(request):
+    """
+    Sugerencias de compra agrupadas por proveedor (las calcula
+    manage.py calcular_reposicion), en páginas de REPOSICION_POR_PAGINA.
+    ?proveedor=<id> muestra uno solo.
+    """
+    sugerencias = (
+        SugerenciaReposicion.objects
+        .filter(cantidad_sugerida__gt=0)
+        .select_related("producto", "producto__proveedor")
+        .order_by("producto__proveedor__nombre", "producto__proveedor_id", "producto__nombre", "pk")
+    )
+    proveedor_id = request.GET.get("proveedor") or ""
+    if proveedor_id.isdigit():
+        sugerencias = sugerencias.filter(producto__proveedor_id=proveedor_id)
+
+    pagina = Paginator(sugerencias, REPOSICION_POR_PAGINA).get_page(request.GET.get("pagina"))
+    filtro = {"proveedor": proveedor_id} if proveedor_id else {}
+    return render(request, "core/reposicion.html", {
+        "sugerencias": pagina.object_list,
+        "pagina": pagina,
+        "anterior": "?" + urlencode({**filtro, "pagina": pagina.previous_page_number()}) if pagina.has_previous() else None,
+        "siguiente": "?" + urlencode({**filtro, "pagina": pagina.next_page_number()}) if pagina.has_next() else None,
+        "proveedores": Proveedor.objects.all(),
+        "proveedor_id": proveedor_id,
+        "calculado": SugerenciaReposicion.objects.order_by("-calculado").values_list("calculado", flat=True).first(),
+    })
 
-        p.drawString(40, y, (prod.nombre or "")[:30])
-        p.drawString(210, y, prod.sku or "")
-        p.drawString(310, y, (prod.categoria.nombre if prod.categoria else "")[:18])
-        p.drawString(430, y, (prod.proveedor.nombre if prod.proveedor else "")[:18])
-        p.drawRightString(590, y, f"{prod.stock} {prod.get_unidad_display()}")
+@login_required
+@require_GET
+def inventario_importacion_progreso(request, trabajo_id):
+    """Progreso de una importación en segundo plano (parcial htmx que se refresca solo)."""
+    trabajo = get_object_or_404(TrabajoImportacion, pk=trabajo_id)
+    return render(request, "core/_importacion_progreso.html", {"t": trabajo})
 
-        y -= 16
 
-    p.showPage()
-    p.save()
+@login_required
+@etag(etag_inventario)
+def inventario_entradas_pdf(request):
+    """
+    Genera un PDF sencillo con el inventario actual.
+    Se guarda en disco por revisión del inventario; si el navegador ya tiene
+    esa revisión (If-None-Match) recibe un 304.
+    """
+    response = FileResponse(
+        abrir_pdf_en_cache(),
+        as_attachment=True,
+        filename="inventario_placacenter.pdf",
+        content_type="application/pdf",
+    )
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
@@ -603,10 +599,28 @@ def cart_partial(request):
     """
     Renderiza el panel del carrito (parcial) desde la sesión actual.
     """
+    return _render_cart(request)
+
+
+def _render_cart(request, aviso=None):
+    """
+    Resuelve todos los productos del carrito con una sola consulta; si alguno
+    fue borrado desde que se agregó, se quita del carrito en vez de dar 404.
+    `aviso` se muestra arriba del panel (ej. código no encontrado).
+    """
     cart = Cart(request)
+    productos = (
+        Producto.objects
+        .only("id", "nombre", "sku")
+        .in_bulk([int(pid) for pid, _ in cart.items()])
+    )
     items = []
+    borrados = []
     for pid, item in cart.items():
-        p = get_object_or_404(Producto, pk=int(pid))
+        p = productos.get(int(pid))
+        if p is None:
+            borrados.append(pid)
+            continue
         qty = int(item["qty"])
         price = Decimal(item["precio"])
         items.append({
@@ -617,9 +631,13 @@ def cart_partial(request):
             "qty": qty,
             "subtotal": float(price * qty),
         })
+    for pid in borrados:
+        cart.remove(pid)
+
     html = render_to_string("core/_cart_panel.html", {
         "items": items,
         "total": cart.subtotal(),
+        "aviso": aviso,
     })
     return HttpResponse(html)
 
@@ -630,6 +648,44 @@ def cart_add(request, producto_id):
     
     return cart_partial(request)
 
+@login_required
+def cart_scan(request, sku):
+    """
+    Lector de código de barras: agrega al carrito por SKU.
+    El SKU se resuelve en memoria (core/typeahead.py), sin consultar la base.
+    """
+    encontrado = resolver_sku(sku)
+    if encontrado is None:
+        return _render_cart(request, aviso=f"Código no encontrado: {sku}")
+    pid, precio = encontrado
+    Cart(request).add(pid, precio, qty=1)
+    return _render_cart(request)
+
+@login_required
+@require_POST
+def cart_scan_lote(request):
+    """
+    Varios escaneos seguidos en una sola petición.
+    `skus` viene separado por comas, espacios o saltos de línea; un SKU
+    repetido suma una unidad por cada vez que aparece.
+    """
+    cart = Cart(request)
+    no_encontrados = []
+    for sku in re.split(r"[\s,;]+", request.POST.get("skus") or ""):
+        if not sku:
+            continue
+        encontrado = resolver_sku(sku)
+        if encontrado is None:
+            no_encontrados.append(sku)
+            continue
+        pid, precio = encontrado
+        cart.add(pid, precio, qty=1)
+
+    aviso = None
+    if no_encontrados:
+        aviso = "Códigos no encontrados: " + ", ".join(no_encontrados)
+    return _render_cart(request, aviso=aviso)
+
 @login_required
 def cart_dec(request, producto_id):
     Cart(request).dec(producto_id, qty=1)
@@ -650,7 +706,7 @@ def reporte_ventas_view(request):
 
     # Tipo de reporte diario semanal mensual anual
     tipo = request.GET.get("tipo", "diario")
-    if tipo not in ("diario", "semanal", "mensual", "anual"):
+    if tipo not in TIPOS_REPORTE:
         tipo = "diario"
 
     # Fechas desde / hasta 
@@ -679,71 +735,10 @@ def reporte_ventas_view(request):
         desde = hoy - timedelta(days=30)
         hasta = hoy
 
-    movimientos = MovimientoInventario.objects.filter(
-        tipo="SALIDA",
-        motivo="VENTA",
-    ).select_related("producto").order_by("fecha")
-
-    if desde:
-        movimientos = movimientos.filter(fecha__date__gte=desde)
-    if hasta:
-        movimientos = movimientos.filter(fecha__date__lte=hasta)
-
-    grupos = OrderedDict()
-    total_cantidad = 0
-    total_venta = Decimal("0.00")
-    total_costo = Decimal("0.00")
-
-    for mov in movimientos:
-        f = mov.fecha
-
-        # Clave según el tipo de reporte
-        if tipo == "diario":
-            key = f.date().strftime("%Y-%m-%d")
-            etiqueta = f.date().strftime("%d/%m/%Y")
-        elif tipo == "semanal":
-            year, week, _ = f.isocalendar()
-            key = f"{year}-W{week:02d}"
-            etiqueta = f"Semana {week} - {year}"
-        elif tipo == "mensual":
-            key = f.strftime("%Y-%m")
-            etiqueta = f.strftime("%m/%Y")
-        else:  # anual
-            key = f.strftime("%Y")
-            etiqueta = key
-
-        if key not in grupos:
-            grupos[key] = {
-                "periodo": etiqueta,
-                "cantidad": 0,
-                "total_venta": Decimal("0.00"),
-                "total_costo": Decimal("0.00"),
-            }
-
-        g = grupos[key]
-        # Cantidad vendida
-        g["cantidad"] += mov.cantidad
-
-        # Costo de compra lo que ya se guarda MovimientoInventario
-        g["total_costo"] += mov.costo_unitario * mov.cantidad
-
-        # Valor de venta usamos el precio_venta actual del producto
-        g["total_venta"] += mov.producto.precio_venta * mov.cantidad
-
-    filas = []
-    for key, g in grupos.items():
-        utilidad = g["total_venta"] - g["total_costo"]
-        filas.append({
-            "periodo": g["periodo"],
-            "cantidad": g["cantidad"],
-            "total_venta": g["total_venta"],
-            "total_costo": g["total_costo"],
-            "utilidad": utilidad,
-        })
-        total_cantidad += g["cantidad"]
-        total_venta += g["total_venta"]
-        total_costo += g["total_costo"]
-
+    filas = ventas_por_periodo(tipo, desde, hasta)
+    total_cantidad = sum(f["cantidad"] for f in filas)
+    total_venta = sum((f["total_venta"] for f in filas), Decimal("0.00"))
+    total_costo = sum((f["total_costo"] for f in filas), Decimal("0.00"))
     total_utilidad = total_venta - total_costo
 
     return render(request, "core/reporte_ventas.html", {
@@ -761,9 +756,9 @@ def reporte_ventas_view(request):
 def ventas_confirmar(request):
     """
     Confirma la venta:
-      - Valida stock de todos los ítems del carrito.
-      - Descuenta stock en transacción con select_for_update().
-      - Registra MovimientoInventario tipo SALIDA al costo promedio.
+      - confirmar_venta (core/checkout.py) bloquea y valida el stock de
+        todos los ítems de una vez, lo descuenta con un UPDATE condicional
+        y registra las SALIDAS al costo promedio.
       - Vacía carrito y muestra comprobante (sin sidebar en la plantilla).
     """
     cart = Cart(request)
@@ -771,89 +766,150 @@ def ventas_confirmar(request):
         messages.warning(request, "El carrito está vacío.")
         return redirect("ventas")
 
-    
-    lineas = []
-    insuficientes = []
-    for pid, item in cart.items():
-        p = get_object_or_404(Producto, pk=int(pid))
-        qty = int(item["qty"])
-        price = Decimal(item["precio"])
-        if p.stock < qty:
-            insuficientes.append((p, qty, p.stock))
-        lineas.append((p, qty, price))
-
-    if insuficientes:
-        msg = "Stock insuficiente para: " + ", ".join(
-            [f"{p.nombre} (necesita {need}, disponible {have})" for p, need, have in insuficientes]
-        )
-        messages.error(request, msg)
+    try:
+        venta, resumen = confirmar_venta(cart, usuario=request.user)
+    except StockInsuficiente as e:
+        messages.error(request, e.mensaje())
         return redirect("ventas")
 
-    resumen = []
-    total = Decimal("0.00")
-    # Descontar y registrar movimiento
-    with transaction.atomic():
-        for p, qty, price in lineas:
-            prod = Producto.objects.select_for_update().get(pk=p.pk)
-            prod.stock = prod.stock - qty
-            prod.save(update_fields=["stock"])
-
-            MovimientoInventario.objects.create(
-                producto=prod,
-                tipo="SALIDA",
-                cantidad=qty,
-                costo_unitario=prod.costo_promedio,
-                motivo="VENTA",
-            )
-
-            subtotal = (price * qty).quantize(Decimal("0.01"))
-            total += subtotal
-            resumen.append({
-                "producto": f"{prod.nombre} ({prod.sku})",
-                "qty": qty,
-                "precio": str(price),
-                "subtotal": float(subtotal),
-            })
-
     cart.empty()
     return render(request, "core/venta_confirmada.html", {
+        "venta": venta,
         "resumen": resumen,
-        "total": float(total),
+        "total": float(venta.total),
     })
 
 
 #  API 
 
-class ProductosStockBajoList(ListAPIView):
+class ProductosStockBajoList(GetCondicionalMixin, ListAPIView):
     """
     Devuelve productos con stock <= stock_minimo y activos.
     Consumida por la Lambda de AWS para generar la alerta.
+    Sale del índice parcial de bajo_stock y se cachea (ver core/alertas.py).
     """
     serializer_class = ProductoSerializer
     permission_classes = [AllowAny] 
+    pagination_class = None  # la Lambda espera la lista completa
 
     def get_queryset(self):
         return (
             Producto.objects
             .select_related("categoria", "proveedor")
-            .filter(activo=True, stock__lte=F("stock_minimo"))
+            .filter(bajo_stock=True)
             .order_by("nombre")
         )
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+    def version_condicional(self):
+        return f"stock-bajo-{huella_stock_bajo()}", None
+
+    def list(self, request, *args, **kwargs):
+        def generar():
+            datos = datos_en_cache(
+                self.version_actual,
+                request.query_params.get("fields", ""),
+                lambda: [dict(p) for p in self.get_serializer(self.get_queryset(), many=True).data],
+            )
+            return Response(datos)
+        return self._condicional(request, generar)
+
+class RecepcionAPIView(APIView):
+    """
+    POST {"motivo": "...", "lineas": [{"producto": id, "cantidad": n, "costo_unitario": "0.00"}, ...]}
+    Registra todas las líneas en una transacción (ver core/entradas.py).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = RecepcionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        try:
+            n = registrar_recepcion(
+                [(l["producto"], l["cantidad"], l["costo_unitario"]) for l in datos["lineas"]],
+                datos.get("motivo") or "RECEPCIÓN",
+            )
+        except ProductosInexistentes as e:
+            return Response({"lineas": [f"No existe el producto {pid}." for pid in e.ids]}, status=400)
+        return Response({"lineas": n}, status=201)
+
+
+class CategoriaViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["nombre"]
 
-class ProveedorViewSet(viewsets.ModelViewSet):
+class ProveedorViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Proveedor.objects.all()
     serializer_class = ProveedorSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["nombre", "nit"]
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Producto.objects.select_related("categoria", "proveedor").all()
     serializer_class = ProductoSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["nombre", "sku"]
\ No newline at end of file
+    filter_backends = [ProductoSearchFilter]
+    search_fields = ["nombre", "sku"]
+
+    def get_queryset(self):
+        pedidos = campos_pedidos(self.request)
+        if self.action != "list" or pedidos is None:
+            return super().get_queryset()
+        # Con ?fields= solo se leen esas columnas y los JOIN que hagan falta
+        relaciones = [r for r in ("categoria", "proveedor") if f"{r}_nombre" in pedidos]
+        columnas = {"id"} | (pedidos & _COLUMNAS_PRODUCTO)
+        qs = Producto.objects.only(*columnas, *(f"{r}__nombre" for r in relaciones))
+        # select_related() sin argumentos seguiría todas las FK
+        return qs.select_related(*relaciones) if relaciones else qs
+
+    @action(detail=False, url_path="cambios")
+    def cambios(self, request):
+        """
+        GET /api/productos/cambios/?desde=<cursor>&limite=500
+        Productos creados o modificados desde el cursor, ids borrados o
+        desactivados y el cursor para la próxima vez (ver core/sincronizacion.py).
+        """
+        try:
+            limite = int(request.query_params.get("limite") or LIMITE_CAMBIOS)
+            actualizados, eliminados, cursor, hay_mas = cambios_desde(
+                request.query_params.get("desde"),
+                limite,
+                Producto.objects.select_related("categoria", "proveedor"),
+            )
+        except ValueError as e:
+            return Response({"detail": str(e) or "Parámetros inválidos."}, status=400)
+        return Response({
+            "cursor": cursor,
+            "hay_mas": hay_mas,
+            "productos": self.get_serializer(actualizados, many=True).data,
+            "eliminados": eliminados,
+        })
+
+    @action(detail=True, url_path="kardex")
+    def kardex(self, request, pk=None):
+        """
+        GET /api/productos/<id>/kardex/?desde=YYYY-MM-DD&cursor=...&tamano=100
+        Movimientos con saldo, valor y costo promedio acumulados, por páginas
+        (ver core/kardex.py). Con ?formato=csv devuelve todo como CSV.
+        """
+        producto = get_object_or_404(Producto.objects.only("id", "sku"), pk=pk)
+        try:
+            desde = _fecha_desde(request.query_params.get("desde"))
+            if request.query_params.get("formato") == "csv":
+                return _kardex_csv(producto, desde)
+            saldo, valor, filas, siguiente = kardex.pagina(
+                producto.pk,
+                request.query_params.get("cursor"),
+                desde,
+                int(request.query_params.get("tamano") or kardex.TAMANO),
+            )
+        except ValueError as e:
+            return Response({"detail": str(e) or "Parámetros inválidos."}, status=400)
+        return Response({
+            "saldo_anterior": saldo,
+            "valor_anterior": str(valor),
+            "movimientos": MovimientoKardexSerializer(filas, many=True).data,
+            "cursor": siguiente,
+            "hay_mas": siguiente is not None,
+        })
\ No newline at end of file
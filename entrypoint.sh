@@ -6,9 +6,23 @@ export DJANGO_SETTINGS_MODULE=${DJANGO_SETTINGS_MODULE:-placacenter.settings}
 export DJANGO_DEBUG=${DJANGO_DEBUG:-False}
 export DJANGO_ALLOWED_HOSTS=${DJANGO_ALLOWED_HOSTS:-*}
 
+# los procesos de fondo corren en su propio contenedor con la misma imagen,
+# así la plataforma los reinicia si se caen: /entrypoint.sh worker | eventos
+case "${1:-web}" in
+  worker)
+    exec python manage.py procesar_importaciones --hilos ${IMPORT_WORKER_THREADS:-2}
+    ;;
+  eventos)
+    exec python manage.py despachar_eventos
+    ;;
+esac
+
 # migraciones sqlite
 python manage.py migrate --noinput
 
+# si MovimientoInventario está particionada, crea las particiones de los próximos meses
+python manage.py particionar_movimientos
+
 # cargar seed con json
 if [ "${LOAD_SEED:-false}" = "true" ] && [ -f "seed.json" ]; then
   python manage.py loaddata seed.json || true
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "core",
 ]
@@ -176,11 +177,21 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     }
 }
 
+# Webhook de eventos (ventas, cruces de stock mínimo); ver manage.py despachar_eventos
+WEBHOOK_EVENTOS_URL = os.getenv("WEBHOOK_EVENTOS_URL", "")
+WEBHOOK_EVENTOS_SECRETO = os.getenv("WEBHOOK_EVENTOS_SECRETO", "")
+
+# Archivos generados que se pueden volver a calcular (PDF de inventario)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / "cache"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 #  DRF 
@@ -188,7 +199,9 @@ REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
-    ]
+    ],
+    "DEFAULT_PAGINATION_CLASS": "core.paginacion.PaginacionCursor",
+    "PAGE_SIZE": 100,
 }
 
 # Auth / Login 
@@ -3,3 +3,7 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'placacenter.settings')
 application = get_wsgi_application()
+
+# Índice de sugerencias de productos en memoria de cada worker
+from core.typeahead import precargar  # noqa: E402
+precargar()